@@ -57,6 +57,18 @@ tests:
 	pytest
 
 
+.PHONY: bench
+bench:
+	$(call log, benchmarking application)
+	$(MANAGEMENT) bench --in-process --output=bench.json
+
+
+.PHONY: bench-imports
+bench-imports:
+	$(call log, benchmarking management startup)
+	$(PYTHON) -m benchmarks.imports
+
+
 .PHONY: coverage
 coverage:
 	$(call log, calculating coverage)
@@ -154,9 +166,8 @@ db: migrate
 .PHONY: wait-for-db
 wait-for-db:
 	$(call log, waiting for DB up)
-	$(DIR_SCRIPTS)/wait_for_postgresql.sh \
-		$(shell $(MANAGEMENT) db-config --host) \
-		$(shell $(MANAGEMENT) db-config --port) \
+	eval "$$($(MANAGEMENT) db-config --host --port)" \
+	&& $(DIR_SCRIPTS)/wait_for_postgresql.sh "$${DB_HOST}" "$${DB_PORT}" \
 		|| exit 1
 
 
@@ -173,27 +184,29 @@ resetdb:  dropdb createdb
 .PHONY: dropdb
 dropdb:
 	$(call log, dropping the DB)
-	dropdb \
+	eval "$$($(MANAGEMENT) db-config --db-name --host --port --username)" \
+	&& dropdb \
 		--echo \
-		--host=$(shell $(MANAGEMENT) db-config --host) \
+		--host="$${DB_HOST}" \
 		--if-exists \
 		--maintenance-db=postgres\
-		--port=$(shell $(MANAGEMENT) db-config --port) \
-		--username=$(shell $(MANAGEMENT) db-config --username) \
-		$(shell $(MANAGEMENT) db-config --db-name)
+		--port="$${DB_PORT}" \
+		--username="$${DB_USER}" \
+		"$${DB_NAME}"
 
 
 .PHONY: createdb
 createdb:
 	$(call log, creating the DB)
-	createdb \
+	eval "$$($(MANAGEMENT) db-config --db-name --host --port --username)" \
+	&& createdb \
 		--echo \
-		--host=$(shell $(MANAGEMENT) db-config --host) \
+		--host="$${DB_HOST}" \
 		--maintenance-db=postgres\
-		--owner=$(shell $(MANAGEMENT) db-config --username) \
-		--port=$(shell $(MANAGEMENT) db-config --port) \
-		--username=$(shell $(MANAGEMENT) db-config --username)\
-		$(shell $(MANAGEMENT) db-config --db-name)
+		--owner="$${DB_USER}" \
+		--port="$${DB_PORT}" \
+		--username="$${DB_USER}"\
+		"$${DB_NAME}"
 
 
 .PHONY: migrations
@@ -1,13 +1,38 @@
+import os
+import shutil
+import tempfile
+
 from framework.config import settings
 from framework.dirs import DIR_SRC
+from main.workers import WORKERS
 
+backlog = settings.SERVER_BACKLOG
 bind = f"0.0.0.0:{settings.PORT}"
 chdir = DIR_SRC.as_posix()
 graceful_timeout = settings.REQUEST_TIMEOUT
-max_requests = 200
-max_requests_jitter = 20
+keepalive = settings.SERVER_KEEPALIVE
+max_requests = settings.WORKER_MAX_REQUESTS
+max_requests_jitter = max_requests // 10
 pythonpath = DIR_SRC.as_posix()
 reload = False
 timeout = graceful_timeout * 2
-worker_class = "uvicorn.workers.UvicornH11Worker"
-workers = settings.WEB_CONCURRENCY
+worker_class = WORKERS[settings.SERVER_PROFILE]
+workers = settings.get_workers_count()
+
+# every worker keeps its metrics in its own memory:
+# /metrics aggregates them through files, see main.metrics
+_metrics_dir_default = workers > 1 and not settings.METRICS_DIR
+if _metrics_dir_default:
+    settings.METRICS_DIR = tempfile.mkdtemp(prefix="exlibris-metrics-")
+    os.environ["METRICS_DIR"] = settings.METRICS_DIR
+
+
+def on_starting(_server) -> None:  # type: ignore
+    from main.metrics import clear_metrics_dir
+
+    clear_metrics_dir()
+
+
+def on_exit(_server) -> None:  # type: ignore
+    if _metrics_dir_default and settings.METRICS_DIR:
+        shutil.rmtree(settings.METRICS_DIR, ignore_errors=True)
@@ -0,0 +1,96 @@
+"""
+Startup benchmark of `python -m management`, based on -X importtime.
+
+Compares running one command, which imports only that command
+and builds the settings once, against importing every command eagerly.
+
+    python -m benchmarks.imports
+"""
+
+import os
+import subprocess
+import sys
+import time
+from typing import Dict
+from typing import List
+from typing import Tuple
+
+REPEAT = 5
+
+SCENARIOS: Dict[str, List[str]] = {
+    "framework.config": ["-c", "import framework.config"],
+    "db-config --host": ["-m", "management", "db-config", "--host"],
+    "all commands": [
+        "-c",
+        "from management.commands import COMMAND_MODULES, load_commands;"
+        "from framework.config import settings;"
+        "load_commands(COMMAND_MODULES)",
+    ],
+}
+
+
+def parse_importtime(stderr: str) -> Tuple[int, int]:
+    """
+    Returns the number of modules imported
+    and the total import time in microseconds.
+    """
+
+    modules = 0
+    total = 0
+
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _prefix, fields = line.split(":", 1)
+        self_us = fields.split("|", 1)[0].strip()
+        if not self_us.isdigit():  # the header
+            continue
+        modules += 1
+        total += int(self_us)
+
+    return modules, total
+
+
+def measure(argv: List[str]) -> Dict[str, float]:
+    env = {**os.environ}
+    env.setdefault("DATABASE_URL", "postgresql://user@localhost:5432/db")
+
+    best: Dict[str, float] = {}
+
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        completed = subprocess.run(  # noqa: S603
+            [sys.executable, "-X", "importtime", *argv],
+            capture_output=True,
+            check=True,
+            env=env,
+            text=True,
+        )
+        wall = time.perf_counter() - started
+
+        modules, import_us = parse_importtime(completed.stderr)
+        if not best or wall < best["wall"]:
+            best = {
+                "import": import_us / 1e6,
+                "modules": modules,
+                "wall": wall,
+            }
+
+    return best
+
+
+def run() -> Dict[str, Dict[str, float]]:
+    results = {name: measure(argv) for name, argv in SCENARIOS.items()}
+
+    for name, result in results.items():
+        print(  # noqa: T001
+            f"{name:>18}: {result['wall'] * 1000:7.1f} ms wall,"
+            f" {result['import'] * 1000:7.1f} ms in"
+            f" {result['modules']:4.0f} imports"
+        )
+
+    return results
+
+
+if __name__ == "__main__":
+    run()
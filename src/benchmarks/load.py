@@ -0,0 +1,290 @@
+"""
+Load benchmark of the application.
+
+Drives main.asgi.application either in-process (like the asgi_client
+test fixture) or against a running server (TEST_SERVICE_URL).
+Results are saved as JSON so that two runs can be compared.
+"""
+
+import asyncio
+import math
+import sys
+import time
+import tracemalloc
+from contextlib import asynccontextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import AsyncIterator
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+
+import httpx
+from pydantic import BaseModel
+from pydantic import Field
+
+TIMEOUT = 10
+
+# metric -> True if the higher is the better
+METRICS: Dict[str, bool] = {
+    "latency_p50": False,
+    "latency_p95": False,
+    "latency_p99": False,
+    "rps": True,
+}
+
+
+class BenchResultT(BaseModel):
+    alloc_blocks: Optional[int] = Field(default=None)
+    alloc_peak: Optional[int] = Field(default=None)
+    concurrency: int = Field(...)
+    errors: int = Field(...)
+    latency_p50: float = Field(...)
+    latency_p95: float = Field(...)
+    latency_p99: float = Field(...)
+    mode: str = Field(...)
+    path: str = Field(...)
+    requests: int = Field(...)
+    rps: float = Field(...)
+    started_at: datetime = Field(...)
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+
+    index = math.ceil(pct / 100 * len(sorted_values)) - 1
+    return sorted_values[max(index, 0)]
+
+
+@asynccontextmanager
+async def running_lifespan(app: Callable) -> AsyncIterator[None]:
+    """
+    Runs the ASGI lifespan of the app around the block,
+    so that the in-process app owns its DB pool as a server worker does.
+    """
+
+    to_app: asyncio.Queue = asyncio.Queue()
+    from_app: asyncio.Queue = asyncio.Queue()
+
+    task = asyncio.ensure_future(
+        app({"type": "lifespan"}, to_app.get, from_app.put)
+    )
+
+    await to_app.put({"type": "lifespan.startup"})
+    message = await from_app.get()
+    if message["type"] != "lifespan.startup.complete":
+        await task
+        raise RuntimeError(message.get("message", "lifespan startup failed"))
+
+    try:
+        yield
+    finally:
+        await to_app.put({"type": "lifespan.shutdown"})
+        await from_app.get()
+        await task
+
+
+async def drive(
+    client: httpx.AsyncClient,
+    *,
+    concurrency: int,
+    path: str,
+    requests: int,
+) -> Dict:
+    latencies: List[float] = []
+    errors = 0
+    remaining = requests
+
+    async def worker() -> None:
+        nonlocal errors, remaining
+
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            try:
+                resp = await client.get(path)
+                if resp.status_code >= 400:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+
+    return {
+        "errors": errors,
+        "latency_p50": percentile(latencies, 50) * 1000,
+        "latency_p95": percentile(latencies, 95) * 1000,
+        "latency_p99": percentile(latencies, 99) * 1000,
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+    }
+
+
+async def measure_allocations(
+    client: httpx.AsyncClient,
+    *,
+    path: str,
+    requests: int,
+) -> Dict:
+    """
+    A separate sequential pass under tracemalloc:
+    tracing slows everything down, so it must not affect the timings.
+    alloc_blocks: memory blocks still allocated after the pass,
+    alloc_peak: peak of traced memory in bytes.
+    """
+
+    blocks_before = sys.getallocatedblocks()
+    tracemalloc.start()
+    try:
+        for _ in range(requests):
+            await client.get(path)
+        _current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "alloc_blocks": sys.getallocatedblocks() - blocks_before,
+        "alloc_peak": peak,
+    }
+
+
+async def bench_in_process(
+    *,
+    concurrency: int,
+    path: str,
+    requests: int,
+) -> BenchResultT:
+    from main.asgi import application
+
+    started_at = datetime.utcnow()
+
+    async with running_lifespan(application):
+        async with httpx.AsyncClient(
+            app=application,
+            base_url="http://asgi",
+            timeout=TIMEOUT,
+        ) as client:
+            # warm up caches and the pool
+            await client.get(path)
+
+            timings = await drive(
+                client,
+                concurrency=concurrency,
+                path=path,
+                requests=requests,
+            )
+            allocations = await measure_allocations(
+                client,
+                path=path,
+                requests=min(requests, 100),
+            )
+
+    return BenchResultT(
+        concurrency=concurrency,
+        mode="in-process",
+        path=path,
+        requests=requests,
+        started_at=started_at,
+        **timings,
+        **allocations,
+    )
+
+
+async def bench_server(
+    base_url: str,
+    *,
+    concurrency: int,
+    path: str,
+    requests: int,
+) -> BenchResultT:
+    started_at = datetime.utcnow()
+
+    limits = httpx.Limits(max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(
+        base_url=base_url,
+        limits=limits,
+        timeout=TIMEOUT,
+    ) as client:
+        await client.get(path)
+
+        timings = await drive(
+            client,
+            concurrency=concurrency,
+            path=path,
+            requests=requests,
+        )
+
+    return BenchResultT(
+        concurrency=concurrency,
+        mode="server",
+        path=path,
+        requests=requests,
+        started_at=started_at,
+        **timings,
+    )
+
+
+def save_result(result: BenchResultT, path: Path) -> None:
+    path.write_text(result.json(indent=2, sort_keys=True))
+
+
+def load_result(path: Path) -> BenchResultT:
+    return BenchResultT.parse_file(path)
+
+
+def compare_results(
+    baseline: BenchResultT,
+    current: BenchResultT,
+    *,
+    threshold: float,
+) -> Dict[str, float]:
+    """
+    Returns relative changes of the metrics which regressed
+    by more than threshold (0.1 is 10%).
+    """
+
+    regressions: Dict[str, float] = {}
+
+    for metric, higher_is_better in METRICS.items():
+        old = getattr(baseline, metric)
+        new = getattr(current, metric)
+        if not old:
+            continue
+
+        change = (new - old) / old
+        worse = -change if higher_is_better else change
+        if worse > threshold:
+            regressions[metric] = change
+
+    return regressions
+
+
+def format_result(
+    result: BenchResultT,
+    baseline: Optional[BenchResultT] = None,
+) -> str:
+    lines = [
+        f"mode:        {result.mode} {result.path}",
+        f"requests:    {result.requests} x {result.concurrency} concurrent",
+        f"errors:      {result.errors}",
+    ]
+
+    for metric in METRICS:
+        new = getattr(result, metric)
+        line = f"{metric + ':':<13}{new:10.2f}"
+        if baseline is not None and getattr(baseline, metric):
+            old = getattr(baseline, metric)
+            line = f"{line}  ({(new - old) / old:+.1%} vs {old:.2f})"
+        lines.append(line)
+
+    if result.alloc_peak is not None:
+        lines.append(f"alloc_peak:  {result.alloc_peak} B")
+        lines.append(f"alloc_blocks:{result.alloc_blocks:>10}")
+
+    return "\n".join(lines)
@@ -0,0 +1,77 @@
+"""
+Benchmark of the DB fetch overlapped with the body receive.
+Both the DB and the client are simulated with fixed latencies.
+
+    python -m benchmarks.overlap
+"""
+
+import asyncio
+import time
+from typing import Dict
+from typing import List
+from unittest import mock
+
+from benchmarks.samples import sample_scope
+from main.asgi import application
+from main.asgi import db_settings_cache
+from main.custom_types import DbSetting
+
+BODY_CHUNKS = 4
+BODY_CHUNK_LATENCY = 0.005
+DB_LATENCY = 0.020
+REQUESTS = 50
+
+
+async def fetch_db_settings() -> List[DbSetting]:
+    await asyncio.sleep(DB_LATENCY)
+    return []
+
+
+async def request_once() -> float:
+    chunks = iter(range(BODY_CHUNKS))
+
+    async def receive() -> Dict:
+        i = next(chunks, None)
+        if i is None:
+            await asyncio.Event().wait()
+        await asyncio.sleep(BODY_CHUNK_LATENCY)
+        return {
+            "body": b"x",
+            "more_body": i != BODY_CHUNKS - 1,
+            "type": "http.request",
+        }
+
+    async def send(_message: Dict) -> None:
+        pass
+
+    db_settings_cache.invalidate()
+
+    started = time.perf_counter()
+    await application(sample_scope(), receive, send)
+    return time.perf_counter() - started
+
+
+async def measure(*, concurrent: bool) -> float:
+    with mock.patch(
+        "framework.config.settings.DB_FETCH_CONCURRENT", concurrent
+    ), mock.patch("main.asgi.fetch_db_settings", fetch_db_settings):
+        latencies = [await request_once() for _ in range(REQUESTS)]
+
+    return sum(latencies) / len(latencies)
+
+
+def run() -> Dict[str, float]:
+    results = {
+        "sequential": asyncio.run(measure(concurrent=False)),
+        "concurrent": asyncio.run(measure(concurrent=True)),
+    }
+    results["saved"] = results["sequential"] - results["concurrent"]
+
+    for mode, seconds in results.items():
+        print(f"{mode:>10}: {seconds * 1e3:8.2f} ms per request")  # noqa: T001
+
+    return results
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,46 @@
+"""
+Micro-benchmark of build_payload: validated vs trusted construction.
+
+    python -m benchmarks.payload
+"""
+
+import timeit
+from typing import Dict
+
+from benchmarks.samples import sample_request
+from benchmarks.samples import sample_scope
+from main.asgi import build_payload
+
+REPEAT = 5
+
+
+def measure(*, trusted: bool) -> float:
+    scope = sample_scope()
+    request = sample_request()
+
+    timer = timeit.Timer(
+        lambda: build_payload(scope, request, [], trusted=trusted)
+    )
+    number, _ = timer.autorange()
+    best = min(timer.repeat(repeat=REPEAT, number=number))
+
+    return best / number
+
+
+def run() -> Dict[str, float]:
+    results = {
+        "validated": measure(trusted=False),
+        "trusted": measure(trusted=True),
+    }
+
+    for mode, seconds in results.items():
+        print(f"{mode:>10}: {seconds * 1e6:8.2f} us per request")  # noqa: T001
+
+    speedup = results["validated"] / results["trusted"]
+    print(f"{'speedup':>10}: {speedup:8.2f}x")  # noqa: T001
+
+    return results
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,36 @@
+from typing import Dict
+from typing import List
+from typing import Tuple
+
+HEADERS: List[Tuple[bytes, bytes]] = [
+    (b"host", b"localhost:8000"),
+    (b"accept", b"*/*"),
+    (b"accept-encoding", b"gzip, deflate"),
+    (b"connection", b"keep-alive"),
+    (b"user-agent", b"python-httpx/0.21.1"),
+]
+
+
+def sample_scope() -> Dict:
+    return {
+        "asgi": {"spec_version": "2.1", "version": "3.0"},
+        "client": ("127.0.0.1", 54321),
+        "headers": list(HEADERS),
+        "http_version": "1.1",
+        "method": "GET",
+        "path": "/",
+        "query_string": b"",
+        "raw_path": b"/",
+        "root_path": "",
+        "scheme": "http",
+        "server": ("127.0.0.1", 8000),
+        "type": "http",
+    }
+
+
+def sample_request() -> Dict:
+    return {
+        "body": b"",
+        "more_body": False,
+        "type": "http.request",
+    }
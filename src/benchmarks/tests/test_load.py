@@ -0,0 +1,79 @@
+from datetime import datetime
+from typing import Any
+from typing import Dict
+from typing import List
+
+import pytest
+
+from benchmarks.load import BenchResultT
+from benchmarks.load import compare_results
+from benchmarks.load import percentile
+
+pytestmark = [
+    pytest.mark.unit,
+]
+
+
+def make_result(**metrics: Any) -> BenchResultT:
+    values = {
+        "latency_p50": 1.0,
+        "latency_p95": 2.0,
+        "latency_p99": 3.0,
+        "rps": 100.0,
+        **metrics,
+    }
+
+    return BenchResultT(
+        concurrency=1,
+        errors=0,
+        mode="app",
+        path="/",
+        requests=100,
+        started_at=datetime(2020, 1, 1),
+        **values,
+    )
+
+
+@pytest.mark.parametrize(
+    "values,pct,expected",
+    [
+        ([], 50, 0.0),
+        ([5.0], 99, 5.0),
+        ([1.0, 2.0, 3.0, 4.0], 50, 2.0),
+        ([1.0, 2.0, 3.0, 4.0], 95, 4.0),
+        ([float(i) for i in range(1, 101)], 99, 99.0),
+        ([1.0, 2.0], 0, 1.0),
+    ],
+)
+def test_percentile(values: List[float], pct: float, expected: float) -> None:
+    assert percentile(values, pct) == expected
+
+
+@pytest.mark.parametrize(
+    "current,regressions",
+    [
+        ({}, {}),
+        # within the threshold
+        ({"latency_p95": 2.1, "rps": 95.0}, {}),
+        # lower latency and higher rps are improvements
+        ({"latency_p99": 1.0, "rps": 200.0}, {}),
+        ({"latency_p50": 1.5}, {"latency_p50": 0.5}),
+        ({"rps": 80.0}, {"rps": -0.2}),
+    ],
+)
+def test_compare_results(
+    current: Dict[str, float],
+    regressions: Dict[str, float],
+) -> None:
+    baseline = make_result()
+    result = make_result(**current)
+
+    assert compare_results(baseline, result, threshold=0.1) == regressions
+
+
+def test_compare_results_zero_baseline() -> None:
+    # nothing to compare with: not a regression, nor a ZeroDivisionError
+    baseline = make_result(latency_p50=0.0, rps=0.0)
+    current = make_result(latency_p50=5.0, rps=1.0)
+
+    assert compare_results(baseline, current, threshold=0.1) == {}
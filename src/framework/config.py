@@ -1,4 +1,8 @@
+import math
+from functools import lru_cache
 from multiprocessing import cpu_count
+from typing import Any
+from typing import Literal
 from typing import NoReturn
 from typing import Optional
 from urllib.parse import urlsplit
@@ -9,6 +13,7 @@ from pydantic import ValidationError
 from pydantic.error_wrappers import ErrorWrapper
 
 from framework.dirs import DIR_CONFIG_SECRETS
+from framework.resources import get_cpu_limit
 
 
 class DatabaseSettings(BaseSettings):
@@ -81,15 +86,85 @@ class DatabaseSettings(BaseSettings):
 class Settings(DatabaseSettings):
     __name__ = "Settings"  # noqa: VNE003
 
+    COMPRESSION_ENABLED: bool = Field(default=True)
+    COMPRESSION_MIN_SIZE: int = Field(default=1024)
+    DB_CURSOR_PREFETCH: int = Field(default=50)
+    DB_FETCH_CONCURRENT: bool = Field(default=True)
+    DB_MAX_CONNECTIONS: Optional[int] = Field()
+    DB_POOL_ACQUIRE_TIMEOUT: float = Field(default=5.0)
+    DB_POOL_MAX_INACTIVE_CONNECTION_LIFETIME: float = Field(default=300.0)
+    DB_POOL_MAX_SIZE: int = Field(default=10)
+    DB_POOL_MIN_SIZE: int = Field(default=1)
+    DB_SETTINGS_CACHE_CHANNEL: Optional[str] = Field(
+        default="db_settings_changed"
+    )
+    DB_SETTINGS_CACHE_TTL: float = Field(default=60.0)
     HEROKU_API_TOKEN: Optional[str] = Field()
     HEROKU_APP_NAME: Optional[str] = Field()
     HOST: str = Field(default="localhost")
+    JSON_COMPACT: bool = Field(default=False)
+    JSON_ENCODER: Literal["auto", "orjson", "stdlib"] = Field(default="stdlib")
+    LOG_FORMAT: Literal["json", "text"] = Field(default="text")
+    LOG_QUEUE_DROP_POLICY: Literal["newest", "oldest"] = Field(
+        default="newest"
+    )
+    LOG_QUEUE_ENABLED: bool = Field(default=False)
+    LOG_QUEUE_SIZE: int = Field(default=10000)
+    METRICS_DIR: Optional[str] = Field()
+    METRICS_ENABLED: bool = Field(default=True)
+    METRICS_FLUSH_INTERVAL: float = Field(default=1.0)
+    METRICS_PATH: str = Field(default="/metrics")
     MODE_DEBUG: bool = Field(default=False)
+    PAYLOAD_PRESERIALIZED: bool = Field(default=True)
+    PAYLOAD_TRUSTED_SCOPE: bool = Field(default=True)
     PORT: int = Field(default=8000)
+    REQUEST_BODY_MAX_SIZE: int = Field(default=1024 * 1024)
+    REQUEST_BODY_ZERO_COPY: bool = Field(default=False)
     REQUEST_TIMEOUT: int = Field(default=30)
+    RESPONSE_CHUNK_SIZE: int = Field(default=16384)
+    RESPONSE_ETAG: bool = Field(default=True)
+    RESPONSE_STREAMING: bool = Field(default=False)
+    RETRY_AFTER: int = Field(default=1)
     SENTRY_DSN: Optional[str] = Field()
+    SENTRY_TRACES_SAMPLE_RATE: float = Field(default=0.01)
+    SENTRY_TRACES_SAMPLE_RATE_ERRORS: float = Field(default=1.0)
+    SERVER_BACKLOG: int = Field(default=2048)
+    SERVER_KEEPALIVE: int = Field(default=5)
+    SERVER_LIMIT_CONCURRENCY: Optional[int] = Field()
+    SERVER_PROFILE: Literal["compat", "fast"] = Field(default="fast")
     TEST_SERVICE_URL: str = Field(default="http://localhost:8000")
-    WEB_CONCURRENCY: int = Field(default=cpu_count() * 2 + 1)
+    WEB_CONCURRENCY: Optional[int] = Field()
+    WORKER_MAX_REQUESTS: int = Field(default=0)
+    WORKER_MAX_RSS: Optional[int] = Field(default=512 * 1024 * 1024)
+    WORKERS_PER_CPU: int = Field(default=1)
+    WORKERS_SIZING: Literal["auto", "fixed"] = Field(default="auto")
+
+    def get_workers_count(self) -> int:
+        """
+        Number of server workers.
+
+        fixed: WEB_CONCURRENCY, or the sync-worker rule of thumb.
+        auto: WORKERS_PER_CPU per CPU of the cgroup quota,
+        bounded by the DB_MAX_CONNECTIONS budget
+        (each worker holds its own pool and a LISTEN connection)
+        and by WEB_CONCURRENCY when it is set.
+        """
+
+        if self.WORKERS_SIZING == "fixed":
+            return self.WEB_CONCURRENCY or cpu_count() * 2 + 1
+
+        workers = math.ceil(get_cpu_limit()) * self.WORKERS_PER_CPU
+
+        if self.DB_MAX_CONNECTIONS:
+            per_worker = self.DB_POOL_MAX_SIZE
+            if self.DB_SETTINGS_CACHE_CHANNEL:
+                per_worker += 1
+            workers = min(workers, self.DB_MAX_CONNECTIONS // per_worker)
+
+        if self.WEB_CONCURRENCY:
+            workers = min(workers, self.WEB_CONCURRENCY)
+
+        return max(workers, 1)
 
     def db_components_from_database_url(self) -> DatabaseSettings:
         if not self.DATABASE_URL:
@@ -107,4 +182,25 @@ class Settings(DatabaseSettings):
         )
 
 
-settings: Settings = Settings()
+# built on the first access, see __getattr__
+settings: Settings
+
+
+@lru_cache(maxsize=None)
+def get_settings() -> Settings:
+    """
+    Reads the environment, .env and the secrets dir once per process.
+    """
+
+    DIR_CONFIG_SECRETS.mkdir(exist_ok=True)
+
+    return Settings()
+
+
+def __getattr__(name: str) -> Any:
+    # PEP 562: `from framework.config import settings` stays as it is,
+    # but the settings are not built until someone imports them
+    if name == "settings":
+        return get_settings()
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -7,7 +7,6 @@ DIR_REPO = _this_file.parent.parent.parent.resolve()
 
 DIR_CONFIG = (DIR_REPO / "config").resolve()
 DIR_CONFIG_SECRETS = Path(os.getenv("SECRETS_DIR", DIR_CONFIG / ".secrets"))
-DIR_CONFIG_SECRETS.mkdir(exist_ok=True)
 
 DIR_IDEA = (DIR_REPO / ".idea").resolve()
 
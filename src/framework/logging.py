@@ -1,4 +1,11 @@
+import atexit
+import json
 import logging
+import os
+import queue
+from logging.handlers import QueueHandler
+from logging.handlers import QueueListener
+from typing import Optional
 
 from framework.config import settings
 
@@ -13,28 +20,172 @@ LEVELS = {
 }
 
 
-def get_logger(logger_name: str) -> logging.Logger:
-    debug = settings.MODE_DEBUG
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line, for high-volume log ingestion.
+    """
 
-    lvl = LEVELS[debug]
-    fmt = FORMATS[debug]
+    def format(self, record: logging.LogRecord) -> str:  # noqa: A003
+        entry = {
+            "func": record.funcName,
+            "level": record.levelname,
+            "line": record.lineno,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "module": record.module,
+            "time": self.formatTime(record, self.datefmt),
+        }
 
-    logger = logging.getLogger(logger_name)
-    logger.setLevel(lvl)
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
 
-    handler = logging.StreamHandler()
-    handler.setLevel(lvl)
+        return json.dumps(entry, default=str, sort_keys=True)
+
+
+class BoundedQueueHandler(QueueHandler):
+    """
+    Puts records into a bounded queue without ever blocking.
+    When the queue is full, drops either the new record ("newest")
+    or the oldest queued one ("oldest") and counts the drop.
+    """
+
+    def __init__(self, log_queue: queue.Queue, drop_policy: str) -> None:
+        super().__init__(log_queue)
+        self.drop_policy = drop_policy
+        self.dropped = 0
+        self.log_queue = log_queue
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.log_queue.put_nowait(record)
+            return
+        except queue.Full:
+            self.dropped += 1
+
+        if self.drop_policy != "oldest":
+            return
+
+        try:
+            self.log_queue.get_nowait()
+            self.log_queue.put_nowait(record)
+        except (queue.Empty, queue.Full):
+            pass
+
+
+# set on the handlers which get_logger() adds
+HANDLER_MARK = "exlibris"
+
+_queue_handler: Optional[BoundedQueueHandler] = None
+_queue_listener: Optional[QueueListener] = None
+
+
+def get_formatter() -> logging.Formatter:
+    if settings.LOG_FORMAT == "json":
+        return JsonFormatter(datefmt="%Y-%m-%dT%H:%M:%S%z")
+
+    fmt = FORMATS[settings.MODE_DEBUG]
 
     formatter = logging.Formatter(
         fmt=fmt, datefmt="%Y-%m-%d %H:%M:%S", style="{"
     )
-    handler.setFormatter(formatter)
 
-    logger.addHandler(handler)
+    return formatter
+
+
+def get_queue_handler() -> BoundedQueueHandler:
+    """
+    The handler shared by all loggers in the queue mode.
+    Records are written to stderr by a listener thread,
+    so that the writes never block the event loop.
+    """
+
+    global _queue_handler, _queue_listener
+
+    if _queue_handler is None:
+        log_queue: queue.Queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+
+        stream_handler = logging.StreamHandler()
+        stream_handler.setFormatter(get_formatter())
+
+        _queue_listener = QueueListener(log_queue, stream_handler)
+        _queue_listener.start()
+        atexit.register(_queue_listener.stop)
+
+        _queue_handler = BoundedQueueHandler(
+            log_queue,
+            settings.LOG_QUEUE_DROP_POLICY,
+        )
+
+    return _queue_handler
+
+
+def get_dropped_records() -> int:
+    return _queue_handler.dropped if _queue_handler is not None else 0
+
+
+def reset_queue_handler() -> None:
+    """
+    Threads do not survive fork, and the locks of the inherited queue
+    may have been held by the listener thread of the parent:
+    a forked worker builds a queue, a listener and a handler of its own,
+    and puts the handler in place of the inherited one.
+    """
+
+    global _queue_handler, _queue_listener
+
+    inherited, _queue_handler = _queue_handler, None
+    if inherited is None:
+        return
+
+    if _queue_listener is not None:
+        atexit.unregister(_queue_listener.stop)
+        _queue_listener = None
+
+    handler = get_queue_handler()
+    handler.setLevel(inherited.level)
+    setattr(handler, HANDLER_MARK, True)  # noqa: B010
+
+    loggers = logging.Logger.manager.loggerDict.values()
+    for logger in loggers:
+        if isinstance(logger, logging.Logger) and inherited in logger.handlers:
+            logger.removeHandler(inherited)
+            logger.addHandler(handler)
+
+
+def get_logger(logger_name: str) -> logging.Logger:
+    """
+    Configures the logger unless it has a handler added by get_logger(),
+    so that repeated calls do not stack handlers.
+    The mark is kept by the logger itself: it survives a reload
+    of this module, unlike any registry in it would.
+    """
+
+    logger = logging.getLogger(logger_name)
+    if not any(getattr(h, HANDLER_MARK, False) for h in logger.handlers):
+        configure_logger(logger)
 
     return logger
 
 
+def configure_logger(logger: logging.Logger) -> None:
+    debug = settings.MODE_DEBUG
+
+    lvl = LEVELS[debug]
+
+    logger.setLevel(lvl)
+
+    handler: logging.Handler
+    if settings.LOG_QUEUE_ENABLED:
+        handler = get_queue_handler()
+    else:
+        handler = logging.StreamHandler()
+        handler.setFormatter(get_formatter())
+    handler.setLevel(lvl)
+    setattr(handler, HANDLER_MARK, True)  # noqa: B010
+
+    logger.addHandler(handler)
+
+
 def mute_root_logger() -> None:
     root_logger = logging.getLogger()
     root_logger.setLevel(logging.CRITICAL)
@@ -43,3 +194,6 @@ def mute_root_logger() -> None:
 
 
 mute_root_logger()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=reset_queue_handler)
@@ -0,0 +1,71 @@
+import os
+from multiprocessing import cpu_count
+from pathlib import Path
+from typing import Optional
+
+try:
+    import resource
+except ImportError:  # pragma: no cover
+    resource = None  # type: ignore
+
+DIR_CGROUP = Path("/sys/fs/cgroup")
+FILE_STATM = Path("/proc/self/statm")
+
+
+def get_cgroup_cpu_quota(dir_cgroup: Path = DIR_CGROUP) -> Optional[float]:
+    """
+    CPU quota of the container in CPUs, None if unlimited or unknown.
+    Supports both cgroup v2 (cpu.max) and v1 (cpu.cfs_quota_us).
+    """
+
+    cpu_max = dir_cgroup / "cpu.max"
+    if cpu_max.is_file():
+        quota, _, period = cpu_max.read_text().strip().partition(" ")
+        if quota == "max":
+            return None
+        return int(quota) / int(period or 100000)
+
+    cfs_quota = dir_cgroup / "cpu" / "cpu.cfs_quota_us"
+    cfs_period = dir_cgroup / "cpu" / "cpu.cfs_period_us"
+    if cfs_quota.is_file() and cfs_period.is_file():
+        quota_us = int(cfs_quota.read_text())
+        if quota_us <= 0:
+            return None
+        return quota_us / int(cfs_period.read_text())
+
+    return None
+
+
+def get_cpu_limit() -> float:
+    """
+    CPUs available to this process:
+    the cgroup quota, bounded by the CPU affinity, bounded by the host.
+    """
+
+    if hasattr(os, "sched_getaffinity"):
+        cpus: float = len(os.sched_getaffinity(0))
+    else:
+        cpus = cpu_count()
+
+    quota = get_cgroup_cpu_quota()
+    if quota is not None:
+        cpus = min(cpus, quota)
+
+    return cpus
+
+
+def get_rss(statm: Path = FILE_STATM) -> Optional[int]:
+    """
+    Resident set size of the current process in bytes,
+    None if unknown: neither procfs nor resource (POSIX only) is there.
+    """
+
+    if statm.is_file():
+        pages = int(statm.read_text().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE")
+
+    if resource is None:
+        return None
+
+    # peak, not current, but the best there is without procfs
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
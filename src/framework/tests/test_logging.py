@@ -0,0 +1,99 @@
+import atexit
+import importlib
+import json
+import logging
+import queue
+from typing import List
+from unittest import mock
+
+import pytest
+
+import framework.logging
+from framework.logging import BoundedQueueHandler
+from framework.logging import get_formatter
+from framework.logging import get_logger
+
+pytestmark = [
+    pytest.mark.unit,
+]
+
+
+def make_record(msg: str) -> logging.LogRecord:
+    return logging.LogRecord("test", logging.INFO, __file__, 1, msg, (), None)
+
+
+@pytest.mark.parametrize(
+    "drop_policy,kept",
+    [
+        ("newest", ["a", "b"]),
+        ("oldest", ["b", "c"]),
+    ],
+)
+def test_bounded_queue_handler(drop_policy: str, kept: List[str]) -> None:
+    log_queue: queue.Queue = queue.Queue(maxsize=2)
+    handler = BoundedQueueHandler(log_queue, drop_policy)
+
+    for msg in ("a", "b", "c"):
+        handler.handle(make_record(msg))
+
+    assert handler.dropped == 1
+    assert [log_queue.get_nowait().msg for _ in range(2)] == kept
+
+
+def test_get_logger_is_idempotent() -> None:
+    logger = get_logger("test.idempotent")
+    nr_handlers = len(logger.handlers)
+
+    for _ in range(10):
+        assert get_logger("test.idempotent") is logger
+
+    assert nr_handlers == 1
+    assert len(logger.handlers) == nr_handlers
+
+
+def test_get_logger_survives_reload() -> None:
+    logger = get_logger("test.reload")
+
+    importlib.reload(framework.logging)
+
+    assert framework.logging.get_logger("test.reload") is logger
+    assert len(logger.handlers) == 1
+
+
+@mock.patch("framework.config.settings.LOG_QUEUE_ENABLED", True)
+@mock.patch("framework.logging._queue_listener", None)
+@mock.patch("framework.logging._queue_handler", None)
+def test_reset_queue_handler() -> None:
+    logger = framework.logging.get_logger("test.queue")
+    inherited = logger.handlers[0]
+    inherited_listener = framework.logging._queue_listener
+    assert inherited_listener is not None
+
+    framework.logging.reset_queue_handler()
+    inherited_listener.stop()
+
+    listener = framework.logging._queue_listener
+    assert listener is not None
+    assert listener is not inherited_listener
+    assert logger.handlers == [framework.logging._queue_handler]
+    assert logger.handlers[0] is not inherited
+
+    handler = logger.handlers[0]
+    logger.info("after fork")
+    atexit.unregister(listener.stop)
+    listener.stop()
+    assert handler.log_queue.empty()  # type: ignore
+
+    logger.removeHandler(handler)
+
+
+@mock.patch("framework.config.settings.LOG_FORMAT", "json")
+def test_json_format() -> None:
+    record = make_record("hello %s")
+    record.args = ("world",)
+
+    entry = json.loads(get_formatter().format(record))
+
+    assert entry["level"] == "INFO"
+    assert entry["logger"] == "test"
+    assert entry["message"] == "hello world"
@@ -0,0 +1,49 @@
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+from framework.resources import get_cgroup_cpu_quota
+from framework.resources import get_cpu_limit
+from framework.resources import get_rss
+
+pytestmark = [
+    pytest.mark.unit,
+]
+
+
+def test_cgroup_v2(tmp_path: Path) -> None:
+    assert get_cgroup_cpu_quota(tmp_path) is None
+
+    (tmp_path / "cpu.max").write_text("max 100000\n")
+    assert get_cgroup_cpu_quota(tmp_path) is None
+
+    (tmp_path / "cpu.max").write_text("150000 100000\n")
+    assert get_cgroup_cpu_quota(tmp_path) == 1.5
+
+
+def test_cgroup_v1(tmp_path: Path) -> None:
+    (tmp_path / "cpu").mkdir()
+    (tmp_path / "cpu" / "cpu.cfs_period_us").write_text("100000\n")
+
+    (tmp_path / "cpu" / "cpu.cfs_quota_us").write_text("-1\n")
+    assert get_cgroup_cpu_quota(tmp_path) is None
+
+    (tmp_path / "cpu" / "cpu.cfs_quota_us").write_text("50000\n")
+    assert get_cgroup_cpu_quota(tmp_path) == 0.5
+
+
+def test_process_resources() -> None:
+    assert get_cpu_limit() > 0
+    rss = get_rss()
+    assert rss is not None
+    assert rss > 0
+
+
+def test_rss_without_procfs(tmp_path: Path) -> None:
+    rss = get_rss(tmp_path / "statm")
+    assert rss is not None
+    assert rss > 0
+
+    with mock.patch("framework.resources.resource", None):
+        assert get_rss(tmp_path / "statm") is None
@@ -1,6 +1,5 @@
 import json
 import os
-from multiprocessing import cpu_count
 from unittest import mock
 
 import pytest
@@ -8,6 +7,7 @@ from pydantic import ValidationError
 
 from framework.config import DatabaseSettings
 from framework.config import Settings
+from framework.config import get_settings
 
 pytestmark = [
     pytest.mark.unit,
@@ -18,20 +18,58 @@ pytestmark = [
 @mock.patch("framework.config.Settings.Config.secrets_dir", None)
 def test_default_settings() -> None:
     settings = Settings()
-    nr_cpus = 2 * cpu_count() + 1
 
+    assert settings.COMPRESSION_ENABLED is True
+    assert settings.COMPRESSION_MIN_SIZE == 1024
     assert settings.DATABASE_URL is None
+    assert settings.DB_CURSOR_PREFETCH == 50
     assert settings.DB_DRIVER is None
+    assert settings.DB_FETCH_CONCURRENT is True
+    assert settings.DB_MAX_CONNECTIONS is None
     assert settings.DB_HOST is None
     assert settings.DB_NAME is None
     assert settings.DB_PASSWORD is None
+    assert settings.DB_POOL_ACQUIRE_TIMEOUT == 5.0
+    assert settings.DB_POOL_MAX_INACTIVE_CONNECTION_LIFETIME == 300.0
+    assert settings.DB_POOL_MAX_SIZE == 10
+    assert settings.DB_POOL_MIN_SIZE == 1
+    assert settings.DB_SETTINGS_CACHE_CHANNEL == "db_settings_changed"
+    assert settings.DB_SETTINGS_CACHE_TTL == 60.0
     assert settings.DB_PORT is None
     assert settings.DB_USER is None
     assert settings.HOST == "localhost"
+    assert settings.JSON_COMPACT is False
+    assert settings.JSON_ENCODER == "stdlib"
+    assert settings.LOG_FORMAT == "text"
+    assert settings.LOG_QUEUE_DROP_POLICY == "newest"
+    assert settings.LOG_QUEUE_ENABLED is False
+    assert settings.LOG_QUEUE_SIZE == 10000
+    assert settings.METRICS_DIR is None
+    assert settings.METRICS_ENABLED is True
+    assert settings.METRICS_FLUSH_INTERVAL == 1.0
+    assert settings.METRICS_PATH == "/metrics"
     assert settings.MODE_DEBUG is False
+    assert settings.PAYLOAD_PRESERIALIZED is True
+    assert settings.PAYLOAD_TRUSTED_SCOPE is True
     assert settings.PORT == 8000
+    assert settings.REQUEST_BODY_MAX_SIZE == 1024 * 1024
+    assert settings.REQUEST_BODY_ZERO_COPY is False
+    assert settings.RESPONSE_CHUNK_SIZE == 16384
+    assert settings.RESPONSE_ETAG is True
+    assert settings.RESPONSE_STREAMING is False
+    assert settings.RETRY_AFTER == 1
     assert settings.SENTRY_DSN is None
-    assert settings.WEB_CONCURRENCY == nr_cpus
+    assert settings.SENTRY_TRACES_SAMPLE_RATE == 0.01
+    assert settings.SENTRY_TRACES_SAMPLE_RATE_ERRORS == 1.0
+    assert settings.SERVER_BACKLOG == 2048
+    assert settings.SERVER_KEEPALIVE == 5
+    assert settings.SERVER_LIMIT_CONCURRENCY is None
+    assert settings.SERVER_PROFILE == "fast"
+    assert settings.WEB_CONCURRENCY is None
+    assert settings.WORKER_MAX_REQUESTS == 0
+    assert settings.WORKER_MAX_RSS == 512 * 1024 * 1024
+    assert settings.WORKERS_PER_CPU == 1
+    assert settings.WORKERS_SIZING == "auto"
     with pytest.raises(ValidationError):
         settings.database_url_from_db_components()
     assert settings.db_components_from_database_url() == DatabaseSettings()
@@ -133,3 +171,31 @@ def test_db_components_from_database_url() -> None:
     assert settings.DB_PASSWORD == "p"
     assert settings.DB_PORT == 1
     assert settings.DB_USER == "u"
+
+
+@mock.patch.dict(os.environ, {}, clear=True)
+@mock.patch("framework.config.Settings.Config.secrets_dir", None)
+@mock.patch("framework.config.get_cpu_limit", return_value=1.5)
+def test_get_workers_count(_get_cpu_limit: mock.Mock) -> None:
+    assert Settings().get_workers_count() == 2
+    assert Settings(WORKERS_PER_CPU=3).get_workers_count() == 6
+    assert Settings(WEB_CONCURRENCY=1).get_workers_count() == 1
+
+    # 10 pooled + 1 LISTEN connection per worker
+    settings = Settings(DB_MAX_CONNECTIONS=12, WORKERS_PER_CPU=4)
+    assert settings.get_workers_count() == 1
+    settings = Settings(DB_MAX_CONNECTIONS=5)
+    assert settings.get_workers_count() == 1
+    settings = Settings(DB_MAX_CONNECTIONS=40, DB_SETTINGS_CACHE_CHANNEL="")
+    assert settings.get_workers_count() == 2
+
+    settings = Settings(WEB_CONCURRENCY=7, WORKERS_SIZING="fixed")
+    assert settings.get_workers_count() == 7
+
+
+def test_settings_are_lazy_and_memoized() -> None:
+    import framework.config
+
+    assert "settings" not in vars(framework.config)
+    assert framework.config.settings is get_settings()
+    assert get_settings() is get_settings()
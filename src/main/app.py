@@ -3,6 +3,7 @@ import uvicorn
 from framework.config import settings
 from framework.logging import get_logger
 from main.asgi import application
+from main.workers import get_server_config
 
 SERVER_RUNNING_BANNER = """
 +----------------------------------------+
@@ -30,6 +31,7 @@ def run() -> None:
             host="0.0.0.0",  # noqa: B104,S104
             port=settings.PORT,
             reload=False,
+            **get_server_config(),
         )
     except KeyboardInterrupt:
         logger.debug("stopping server")
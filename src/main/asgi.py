@@ -1,74 +1,213 @@
+import asyncio
+import json
+import logging
 import traceback
-from contextlib import asynccontextmanager
+from typing import Any
 from typing import AsyncIterator
 from typing import Callable
 from typing import Dict
 from typing import List
 from typing import Optional
+from typing import Sequence
+from typing import Tuple
 
 import asyncpg
 import sentry_sdk
 
 from framework.config import settings
+from framework.logging import get_dropped_records
 from framework.logging import get_logger
+from main import metrics
+from main.body import ClientDisconnectedError
+from main.body import RequestBodyTooLargeError
+from main.body import cancel_on_disconnect
+from main.body import read_body
+from main.cache import TtlCache
+from main.compression import COMPRESSORS
+from main.compression import negotiate_encoding
+from main.conditional import is_not_modified
 from main.custom_types import DbSetting
 from main.custom_types import HostPortT
 from main.custom_types import PayloadT
 from main.custom_types import RequestT
 from main.custom_types import ScopeAsgiT
 from main.custom_types import ScopeT
-
-sentry_sdk.init(settings.SENTRY_DSN, traces_sample_rate=1.0)
+from main.db import DbUnavailableError
+from main.db import close_db_listener
+from main.db import close_db_pool
+from main.db import get_db_connection
+from main.db import open_db_listener
+from main.db import open_db_pool
+from main.db import statements
+from main.deadline import DeadlineExceededError
+from main.deadline import deadline_scope
+from main.deadline import get_timeout
+from main.encoders import Encoder
+from main.encoders import negotiate_encoder
+from main.metrics import PHASE_SECONDS
+from main.metrics import Counter
+from main.query import InvalidQueryError
+from main.query import SettingsQuery
+from main.query import parse_settings_query
+from main.sentry import instrument_application
+from main.snapshot import DbSettingsSnapshot
+from main.snapshot import dump_payload
+from main.streaming import prefetch
+from main.streaming import send_chunked
+from main.streaming import stream_payload
 
 logger = get_logger("asgi")
 
 
-@asynccontextmanager
-async def get_db_connection() -> AsyncIterator:
-    conn: Optional[asyncpg.Connection] = None
-    try:
-        conn = await asyncpg.connect(settings.DATABASE_URL)
-        yield conn
-    except Exception:
-        logger.error(traceback.format_exc())
-        raise
-    finally:
-        if conn is not None:
-            await conn.close()
+SQL_DB_SETTINGS = """
+    SELECT
+        trim(short_desc || ' ' || coalesce(extra_desc, '')) as description,
+        name,
+        setting,
+        unit
+    FROM
+        pg_settings
+    ;
+"""
+
+STMT_DB_SETTINGS = statements.register("db_settings", SQL_DB_SETTINGS)
+
+
+async def fetch_db_settings() -> List[DbSetting]:
+    conn: asyncpg.Connection
+    async with get_db_connection() as conn:
+        with PHASE_SECONDS.time("db_query"):
+            stmt = await statements.get(conn, STMT_DB_SETTINGS)
+            records = await stmt.fetch(timeout=get_timeout())
+
+    with PHASE_SECONDS.time("db_parse"):
+        db_settings = [DbSetting.parse_obj(rec) for rec in records]
+
+    return db_settings
 
 
-async def get_db_settings() -> List[DbSetting]:
-    sql = """
-        SELECT
-            trim(short_desc || ' ' || coalesce(extra_desc, '')) as description,
-            name,
-            setting,
-            unit
-        FROM
-            pg_settings
-        ;
+async def iter_db_settings() -> AsyncIterator[DbSetting]:
+    """
+    Yields db settings one by one from a server-side cursor,
+    so that they are never held in memory all at once.
+    Bypasses the cache. Errors are raised as is,
+    also once the status has been sent: the response is aborted
+    rather than completed with a list cut short.
     """
 
-    db_settings: List[DbSetting] = []
+    conn: asyncpg.Connection
+    async with get_db_connection() as conn:
+        stmt = await statements.get(conn, STMT_DB_SETTINGS)
+        async with conn.transaction():
+            cursor = stmt.cursor(
+                prefetch=settings.DB_CURSOR_PREFETCH,
+                timeout=get_timeout(),
+            )
+            async for rec in cursor:
+                yield DbSetting.parse_obj(rec)
 
-    try:
-        conn: asyncpg.Connection
-        async with get_db_connection() as conn:
-            stmt = await conn.prepare(sql)
-            records = await stmt.fetch()
 
-        db_settings = [DbSetting.parse_obj(rec) for rec in records]
+async def load_db_snapshot() -> DbSettingsSnapshot:
+    """
+    The cache runs it in a task of its own, shared by all the requests
+    which wait for the refresh: it is bound by a deadline of its own,
+    not by the one of the request which happened to start it.
+    Every waiter applies its own deadline while waiting.
+    """
+
+    with deadline_scope(settings.REQUEST_TIMEOUT):
+        db_settings = await fetch_db_settings()
+    return DbSettingsSnapshot(db_settings)
+
+
+db_settings_cache: TtlCache[DbSettingsSnapshot] = TtlCache(
+    load_db_snapshot,
+    ttl=settings.DB_SETTINGS_CACHE_TTL,
+)
+
+
+async def get_db_snapshot() -> DbSettingsSnapshot:
+    snapshot = DbSettingsSnapshot([])
 
+    try:
+        snapshot = await db_settings_cache.get()
+    except asyncpg.QueryCanceledError as err:
+        # statement_timeout
+        raise DeadlineExceededError(str(err)) from err
     except asyncpg.PostgresError:
         pass
 
-    return db_settings
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("db settings cache: %s", db_settings_cache.stats())
+
+    return snapshot
+
+
+Counter(
+    "exlibris_db_settings_cache_generation_total",
+    "Number of db settings snapshots loaded",
+    lambda: db_settings_cache.generation,
+)
+Counter(
+    "exlibris_db_settings_cache_hits_total",
+    "Number of db settings cache hits",
+    lambda: db_settings_cache.hits,
+)
+Counter(
+    "exlibris_db_settings_cache_misses_total",
+    "Number of db settings cache misses",
+    lambda: db_settings_cache.misses,
+)
+Counter(
+    "exlibris_db_settings_cache_refreshes_total",
+    "Number of db settings cache refreshes",
+    lambda: db_settings_cache.refreshes,
+)
 
 
-async def application(scope: Dict, receive: Callable, send: Callable) -> None:
+Counter(
+    "exlibris_log_records_dropped_total",
+    "Number of log records dropped because the log queue was full",
+    get_dropped_records,
+)
+
+
+def invalidate_db_settings(*_args: Any) -> None:
+    """
+    Drops cached db settings, e.g. after pg_reload_conf().
+    Signature fits asyncpg listener callbacks.
+    """
+
+    db_settings_cache.invalidate()
+    logger.debug("db settings cache has been invalidated")
+
+
+async def dispatch(scope: Dict, receive: Callable, send: Callable) -> None:
     if scope["type"] == "lifespan":
+        await lifespan(receive, send)
         return
 
+    if settings.METRICS_ENABLED and scope["path"] == settings.METRICS_PATH:
+        await send_response(
+            send,
+            200,
+            await metrics.expose(),
+            content_type=metrics.CONTENT_TYPE,
+        )
+        return
+
+    deadline = deadline_scope(settings.REQUEST_TIMEOUT)
+    with PHASE_SECONDS.time("request"), deadline:
+        await handle_http(scope, receive, send)
+
+    await metrics.flush()
+
+
+# starts a Sentry transaction per request when SENTRY_DSN is set
+application = instrument_application(dispatch)
+
+
+async def handle_http(scope: Dict, receive: Callable, send: Callable) -> None:
     path = scope["path"]
     logger.debug("path: %s", path)
 
@@ -76,41 +215,354 @@ async def application(scope: Dict, receive: Callable, send: Callable) -> None:
         logger.debug("here goes an error ...")
         print(1 / 0)  # noqa: T001
 
-    request = await receive()
-    logger.debug("request: %s", request)
+    try:
+        query = parse_settings_query(scope["query_string"])
+    except InvalidQueryError as err:
+        await send_error(send, 400, str(err))
+        return
+
+    # the DB round trip does not depend on the body: overlap them
+    snapshot_task: Optional["asyncio.Future[DbSettingsSnapshot]"] = None
+    if settings.DB_FETCH_CONCURRENT and not settings.RESPONSE_STREAMING:
+        snapshot_task = asyncio.ensure_future(get_db_snapshot())
+
+    try:
+        request = await read_body(
+            scope,
+            receive,
+            max_size=settings.REQUEST_BODY_MAX_SIZE,
+            zero_copy=settings.REQUEST_BODY_ZERO_COPY,
+        )
+    except RequestBodyTooLargeError as err:
+        cancel(snapshot_task)
+        logger.debug("request body is too large: %s", err)
+        await send_error(send, 413, "request body is too large")
+        return
+    except ClientDisconnectedError:
+        cancel(snapshot_task)
+        logger.debug("client has disconnected")
+        return
+
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("request: %s", request)
+
+    encoder = negotiate_encoder(scope["headers"])
+
+    if settings.RESPONSE_STREAMING:
+        await respond_streaming(scope, request, send, encoder, query)
+        return
+
+    await respond(
+        scope,
+        request,
+        receive,
+        send,
+        encoder,
+        query,
+        snapshot_task,
+    )
+
+
+async def respond(
+    scope: Dict,
+    request: Dict,
+    receive: Callable,
+    send: Callable,
+    encoder: Encoder,
+    query: Optional[SettingsQuery],
+    snapshot_task: Optional["asyncio.Future[DbSettingsSnapshot]"],
+) -> None:
+    # nothing is sent until the body is ready, so any failure has its status
+    try:
+        timeout = get_timeout()
+        snapshot = await cancel_on_disconnect(
+            asyncio.wait_for(snapshot_task or get_db_snapshot(), timeout),
+            receive,
+        )
+        etag = get_etag(snapshot)
+        body: Optional[bytes] = None
+        encoding: Optional[str] = None
+        if not is_not_modified(scope["headers"], etag):
+            body = render_body(scope, request, snapshot, encoder, query)
+            body, encoding = compress_body(
+                scope, body, snapshot, encoder, query
+            )
+    except ClientDisconnectedError:
+        logger.debug("client has disconnected")
+        return
+    except Exception as err:
+        cancel(snapshot_task)
+        await send_failure(send, err)
+        return
+
+    headers = [[b"etag", etag]] if etag is not None else []
+    headers.append([b"vary", get_vary()])
+    if encoding is not None:
+        headers.append([b"content-encoding", encoding.encode()])
+
+    if body is None:
+        await send_response_start(send, 304, headers=headers)
+        await send({"body": b"", "type": "http.response.body"})
+        logger.debug("not modified")
+        return
+
+    await send_response(send, 200, body, headers=headers)
+
+    logger.debug("response has been sent")
+
+
+async def respond_streaming(
+    scope: Dict,
+    request: Dict,
+    send: Callable,
+    encoder: Encoder,
+    query: Optional[SettingsQuery],
+) -> None:
+    # the connection and the cursor are open, and the first rows are read,
+    # before the status is sent: failures to get there have their status
+    try:
+        db_settings = await prefetch(iter_db_settings())
+    except Exception as err:
+        await send_failure(send, err)
+        return
+
+    await send_response_start(send, 200, headers=[[b"vary", b"accept"]])
+    payload = build_payload(scope, request, [])
+    pieces = stream_payload(payload, db_settings, encoder, query)
+    await send_chunked(send, pieces, settings.RESPONSE_CHUNK_SIZE)
+
+    logger.debug("response has been streamed")
+
+
+async def send_failure(send: Callable, err: Exception) -> None:
+    """
+    Sends the status of a failure which has happened
+    before the response has started. Called from the except block.
+    """
+
+    if isinstance(
+        err,
+        (
+            DeadlineExceededError,
+            asyncio.TimeoutError,
+            asyncpg.QueryCanceledError,
+        ),
+    ):
+        logger.debug("request deadline exceeded: %r", err)
+        await send_error(send, 504, "request deadline exceeded")
+
+    elif isinstance(err, DbUnavailableError):
+        logger.debug("db is unavailable: %s", err)
+        retry_after = str(settings.RETRY_AFTER).encode()
+        await send_error(
+            send,
+            503,
+            "database is unavailable",
+            headers=[[b"retry-after", retry_after]],
+        )
+
+    else:
+        logger.error(traceback.format_exc())
+        sentry_sdk.capture_exception()
+        await send_error(send, 500, "internal server error")
+
+
+def get_vary() -> bytes:
+    """
+    The body depends on Accept (the encoder),
+    and on Accept-Encoding when compression is on.
+    """
+
+    if settings.COMPRESSION_ENABLED:
+        return b"accept, accept-encoding"
+
+    return b"accept"
+
+
+def compress_body(
+    scope: Dict,
+    body: bytes,
+    snapshot: DbSettingsSnapshot,
+    encoder: Encoder,
+    query: Optional[SettingsQuery],
+) -> Tuple[bytes, Optional[str]]:
+    """
+    Compresses the body as the client accepts, if it is large enough.
+    The whole-snapshot body is gzipped from the precompressed
+    state of the snapshot: only the per-request tail costs CPU.
+    """
+
+    if not settings.COMPRESSION_ENABLED:
+        return body, None
+
+    encoding = negotiate_encoding(scope["headers"])
+    if encoding is None or len(body) < settings.COMPRESSION_MIN_SIZE:
+        return body, None
+
+    with PHASE_SECONDS.time("compress"):
+        if settings.PAYLOAD_PRESERIALIZED and query is None:
+            precompressed = snapshot.precompressed(encoder, encoding)
+            if body.startswith(precompressed.prefix):
+                return precompressed.compress(body), encoding
+
+        return COMPRESSORS[encoding](body), encoding
+
 
+def get_etag(snapshot: DbSettingsSnapshot) -> Optional[bytes]:
+    """
+    None for an empty snapshot: it is what a DB failure looks like.
+    """
+
+    if not settings.RESPONSE_ETAG or not snapshot.db_settings:
+        return None
+
+    return snapshot.etag
+
+
+def render_body(
+    scope: Dict,
+    request: Dict,
+    snapshot: DbSettingsSnapshot,
+    encoder: Encoder,
+    query: Optional[SettingsQuery] = None,
+) -> bytes:
+    if settings.PAYLOAD_PRESERIALIZED:
+        with PHASE_SECONDS.time("build"):
+            payload = build_payload(scope, request, [])
+        with PHASE_SECONDS.time("encode"):
+            return dump_payload(payload, snapshot, encoder, query)
+
+    if query is not None:
+        with PHASE_SECONDS.time("build"):
+            payload = build_payload(scope, request, [])
+            obj = payload.dict()
+            obj["db_settings"] = snapshot.select(query)
+        with PHASE_SECONDS.time("encode"):
+            return encoder.dumps(obj)
+
+    with PHASE_SECONDS.time("build"):
+        payload = build_payload(scope, request, snapshot.db_settings)
+    with PHASE_SECONDS.time("encode"):
+        return encoder.dumps(payload.dict())
+
+
+def cancel(task: Optional[asyncio.Future]) -> None:
+    if task is not None:
+        task.cancel()
+
+
+async def send_response_start(
+    send: Callable,
+    status: int,
+    *,
+    content_type: bytes = b"application/json",
+    headers: Sequence[List[bytes]] = (),
+) -> None:
     await send(
         {
             "headers": [
-                [b"content-type", b"application/json"],
+                [b"content-type", content_type],
+                *headers,
             ],
-            "status": 200,
+            "status": status,
             "type": "http.response.start",
         }
     )
 
-    db_settings = await get_db_settings()
-    payload = build_payload(scope, request, db_settings)
 
+async def send_response(
+    send: Callable,
+    status: int,
+    body: bytes,
+    *,
+    content_type: bytes = b"application/json",
+    headers: Sequence[List[bytes]] = (),
+) -> None:
+    content_length = str(len(body)).encode()
+
+    await send_response_start(
+        send,
+        status,
+        content_type=content_type,
+        headers=[[b"content-length", content_length], *headers],
+    )
     await send(
         {
-            "body": payload.json(sort_keys=True, indent=2).encode(),
+            "body": body,
             "type": "http.response.body",
         }
     )
 
-    logger.debug("response has been sent")
+
+async def send_error(
+    send: Callable,
+    status: int,
+    detail: str,
+    *,
+    headers: Sequence[List[bytes]] = (),
+) -> None:
+    body = json.dumps({"detail": detail}).encode()
+    await send_response(send, status, body, headers=headers)
+
+
+async def lifespan(receive: Callable, send: Callable) -> None:
+    while True:
+        message = await receive()
+
+        if message["type"] == "lifespan.startup":
+            # a DB outage MUST NOT fail the worker boot:
+            # requests get 503 until the pool opens on an acquire
+            try:
+                await open_db_pool()
+                if settings.DB_SETTINGS_CACHE_CHANNEL:
+                    await open_db_listener(
+                        settings.DB_SETTINGS_CACHE_CHANNEL,
+                        invalidate_db_settings,
+                    )
+            except Exception:
+                logger.error(traceback.format_exc())
+            await send({"type": "lifespan.startup.complete"})
+
+        elif message["type"] == "lifespan.shutdown":
+            await close_db_listener()
+            await close_db_pool()
+            await metrics.flush(force=True)
+            await send({"type": "lifespan.shutdown.complete"})
+            return
 
 
 def build_payload(
     scope: Dict,
     request: Dict,
     db_settings: List[DbSetting],
+    *,
+    trusted: Optional[bool] = None,
+) -> PayloadT:
+    """
+    Builds the payload from ASGI scope and request.
+    The trusted mode skips pydantic validation
+    since the data comes straight from the ASGI server.
+    Defaults to PAYLOAD_TRUSTED_SCOPE setting.
+    """
+
+    if trusted is None:
+        trusted = settings.PAYLOAD_TRUSTED_SCOPE
+
+    if trusted:
+        return build_payload_trusted(scope, request, db_settings)
+
+    return build_payload_validated(scope, request, db_settings)
+
+
+def build_payload_validated(
+    scope: Dict,
+    request: Dict,
+    db_settings: List[DbSetting],
 ) -> PayloadT:
     payload = PayloadT(
         db_settings=db_settings,
         request=RequestT(
-            body=request["body"].decode(),
+            body=str(request["body"], "utf-8"),
             more_body=request["more_body"],
             type=request["type"],
         ),
@@ -135,3 +587,41 @@ def build_payload(
     )
 
     return payload
+
+
+def build_payload_trusted(
+    scope: Dict,
+    request: Dict,
+    db_settings: List[DbSetting],
+) -> PayloadT:
+    asgi = scope["asgi"]
+    client_host, client_port = scope["client"]
+    server_host, server_port = scope["server"]
+
+    payload = PayloadT.construct(
+        db_settings=db_settings,
+        request=RequestT.construct(
+            body=str(request["body"], "utf-8"),
+            more_body=request["more_body"],
+            type=request["type"],
+        ),
+        scope=ScopeT.construct(
+            asgi=ScopeAsgiT.construct(
+                spec_version=asgi.get("spec_version"),
+                version=asgi["version"],
+            ),
+            client=HostPortT.construct(host=client_host, port=client_port),
+            headers={k.decode(): v.decode() for k, v in scope["headers"]},
+            http_version=scope["http_version"],
+            method=scope["method"],
+            path=scope["path"],
+            query_string=scope["query_string"].decode(),
+            raw_path=scope["raw_path"].decode(),
+            root_path=scope["root_path"],
+            scheme=scope["scheme"],
+            server=HostPortT.construct(host=server_host, port=server_port),
+            type=scope["type"],
+        ),
+    )
+
+    return payload
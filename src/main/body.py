@@ -0,0 +1,119 @@
+import asyncio
+from typing import Awaitable
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import Optional
+from typing import Tuple
+from typing import TypeVar
+
+T = TypeVar("T")
+
+
+class ClientDisconnectedError(Exception):
+    pass
+
+
+class RequestBodyTooLargeError(Exception):
+    pass
+
+
+def get_content_length(
+    headers: Iterable[Tuple[bytes, bytes]],
+) -> Optional[int]:
+    for name, value in headers:
+        if name.lower() == b"content-length":
+            try:
+                return int(value)
+            except ValueError:
+                return None
+
+    return None
+
+
+async def read_body(
+    scope: Dict,
+    receive: Callable,
+    *,
+    max_size: int,
+    zero_copy: bool = False,
+) -> Dict:
+    """
+    Receives all http.request messages and accumulates the whole body.
+    The buffer is preallocated when Content-Length is known.
+    Returns the request message with the full body:
+    bytes, or a memoryview over the buffer when zero_copy is set.
+    The payload decodes the body to str anyway, so the copy is saved
+    only by consumers of the raw bytes.
+    """
+
+    content_length = get_content_length(scope["headers"])
+    if content_length is not None and content_length > max_size:
+        raise RequestBodyTooLargeError(content_length)
+
+    buffer = bytearray(content_length or 0)
+    size = 0
+    more_body = True
+
+    while more_body:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            raise ClientDisconnectedError()
+
+        chunk = message.get("body", b"")
+        if size + len(chunk) > max_size:
+            raise RequestBodyTooLargeError(size + len(chunk))
+
+        buffer[size : size + len(chunk)] = chunk  # noqa: E203
+        size += len(chunk)
+        more_body = message.get("more_body", False)
+
+    view = memoryview(buffer)[:size]
+
+    request = {
+        "body": view if zero_copy else view.tobytes(),
+        "more_body": False,
+        "type": "http.request",
+    }
+
+    return request
+
+
+async def wait_for_disconnect(receive: Callable) -> None:
+    """
+    Returns once the client has disconnected.
+    MUST be called after the whole body has been received.
+    """
+
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return
+
+
+async def cancel_on_disconnect(aw: Awaitable[T], receive: Callable) -> T:
+    """
+    Awaits aw while watching the client.
+    If the client disconnects first, aw is cancelled
+    and ClientDisconnectedError is raised.
+    MUST be called after the whole body has been received.
+    """
+
+    task = asyncio.ensure_future(aw)
+    watcher = asyncio.ensure_future(wait_for_disconnect(receive))
+
+    try:
+        await asyncio.wait(
+            {task, watcher},
+            return_when=asyncio.FIRST_COMPLETED,
+        )
+    finally:
+        watcher.cancel()
+        disconnected = not task.done()
+        if disconnected:
+            task.cancel()
+
+    if disconnected:
+        raise ClientDisconnectedError()
+
+    return task.result()
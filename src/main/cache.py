@@ -0,0 +1,91 @@
+import asyncio
+import time
+from typing import Awaitable
+from typing import Callable
+from typing import Dict
+from typing import Generic
+from typing import Optional
+from typing import TypeVar
+from typing import cast
+
+T = TypeVar("T")
+
+
+class TtlCache(Generic[T]):
+    """
+    In-process cache of a single value which expires after TTL seconds.
+    Concurrent misses share one refresh (single-flight),
+    so a herd of requests after expiration results in one load.
+    The loader runs in a task of its own, which copies the context
+    of the caller that started the refresh.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[], Awaitable[T]],
+        *,
+        ttl: float,
+    ) -> None:
+        self.loader = loader
+        self.ttl = ttl
+
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+
+        self._epoch = 0
+        self._expires_at = 0.0
+        self._refresh: Optional["asyncio.Future[T]"] = None
+        self._valid = False
+        self._value: Optional[T] = None
+
+    @property
+    def is_fresh(self) -> bool:
+        return self._valid and time.monotonic() < self._expires_at
+
+    async def get(self) -> T:
+        if self.is_fresh:
+            self.hits += 1
+            return cast(T, self._value)
+
+        self.misses += 1
+        if self._refresh is None:
+            self._refresh = asyncio.ensure_future(self._load(self._epoch))
+
+        return await asyncio.shield(self._refresh)
+
+    def invalidate(self) -> None:
+        """
+        Drops the cached value: the next get() loads a new one.
+        A refresh which is in flight at the moment is not stored.
+        """
+
+        self._epoch += 1
+        self._refresh = None
+        self._valid = False
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "generation": self.generation,
+            "hits": self.hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+        }
+
+    async def _load(self, epoch: int) -> T:
+        try:
+            value = await self.loader()
+        finally:
+            if epoch == self._epoch:
+                self._refresh = None
+
+        self.refreshes += 1
+
+        if epoch == self._epoch:
+            self._expires_at = time.monotonic() + self.ttl
+            self._valid = True
+            self._value = value
+            self.generation += 1
+
+        return value
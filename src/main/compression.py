@@ -0,0 +1,159 @@
+"""
+Content-Encoding of response bodies.
+
+gzip is always available, br and zstd when brotli or zstandard is installed.
+Bodies which start with the cacheable part of a snapshot
+(the payload head and the db_settings block) are gzipped
+from a Precompressed state kept by the snapshot:
+only the per-request tail is compressed per request.
+"""
+
+import zlib
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import Optional
+from typing import Tuple
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None  # type: ignore
+
+BROTLI_QUALITY = 5
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+
+def compress_gzip(data: bytes) -> bytes:
+    compressor = zlib.compressobj(
+        GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS
+    )
+    return compressor.compress(data) + compressor.flush()
+
+
+def compress_br(data: bytes) -> bytes:
+    compressed: bytes = brotli.compress(data, quality=BROTLI_QUALITY)
+    return compressed
+
+
+def compress_zstd(data: bytes) -> bytes:
+    compressed: bytes = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(
+        data
+    )
+    return compressed
+
+
+# in the order of preference when the client accepts them equally:
+# gzip is understood by every client and is the only one precompressed,
+# zstd and br compress the whole body on every request
+COMPRESSORS: Dict[str, Callable[[bytes], bytes]] = {
+    name: compress
+    for name, compress, available in (
+        ("gzip", compress_gzip, True),
+        ("zstd", compress_zstd, zstandard is not None),
+        ("br", compress_br, brotli is not None),
+    )
+    if available
+}
+
+
+class Precompressed:
+    """
+    The prefix compressed once, so that compressing a body
+    which starts with it costs about as much as compressing the rest.
+
+    gzip: the deflate state after the prefix is copied per body.
+    zstd, br: the whole body is compressed. A zstd body of two frames
+    is valid, but common decoders stop after the first one.
+    """
+
+    def __init__(self, encoding: str, prefix: bytes) -> None:
+        self.encoding = encoding
+        self.prefix = prefix
+
+        self._compressed_prefix = b""
+        self._gzip: Optional["zlib._Compress"] = None
+
+        if encoding == "gzip":
+            self._gzip = zlib.compressobj(
+                GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS
+            )
+            self._compressed_prefix = self._gzip.compress(prefix)
+
+    def compress(self, body: bytes) -> bytes:
+        """
+        The body MUST start with the prefix.
+        """
+
+        if self._gzip is not None:
+            rest = body[len(self.prefix) :]  # noqa: E203
+            compressor = self._gzip.copy()
+            return b"".join(
+                (
+                    self._compressed_prefix,
+                    compressor.compress(rest),
+                    compressor.flush(),
+                )
+            )
+
+        return COMPRESSORS[self.encoding](body)
+
+
+def negotiate_encoding(
+    headers: Iterable[Tuple[bytes, bytes]],
+) -> Optional[str]:
+    """
+    Picks the one of COMPRESSORS which the Accept-Encoding header
+    of the request accepts with the highest q-value;
+    the order of COMPRESSORS breaks ties. None means identity,
+    also when the client prefers identity to every one of them.
+    """
+
+    for name, value in headers:
+        if name.lower() == b"accept-encoding":
+            accepted = parse_accept_encoding(value.decode("latin-1"))
+            break
+    else:
+        return None
+
+    best: Optional[str] = None
+    best_qvalue = 0.0
+
+    for encoding in COMPRESSORS:
+        qvalue = accepted.get(encoding, accepted.get("*", 0.0))
+        if qvalue > best_qvalue:
+            best, best_qvalue = encoding, qvalue
+
+    if accepted.get("identity", 0.0) > best_qvalue:
+        return None
+
+    return best
+
+
+def parse_accept_encoding(accept_encoding: str) -> Dict[str, float]:
+    accepted: Dict[str, float] = {}
+
+    for coding in accept_encoding.split(","):
+        name, *params = coding.split(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+
+        qvalue = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    qvalue = float(value)
+                except ValueError:
+                    qvalue = 0.0
+
+        accepted[name] = qvalue
+
+    return accepted
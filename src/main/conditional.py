@@ -0,0 +1,43 @@
+from typing import Iterable
+from typing import Optional
+from typing import Tuple
+
+
+def get_if_none_match(
+    headers: Iterable[Tuple[bytes, bytes]],
+) -> Optional[bytes]:
+    for name, value in headers:
+        if name.lower() == b"if-none-match":
+            return value
+
+    return None
+
+
+def is_not_modified(
+    headers: Iterable[Tuple[bytes, bytes]],
+    etag: Optional[bytes],
+) -> bool:
+    """
+    If-None-Match evaluation (RFC 7232, 3.2), weak comparison.
+    """
+
+    if etag is None:
+        return False
+
+    if_none_match = get_if_none_match(headers)
+    if if_none_match is None:
+        return False
+
+    if if_none_match.strip() == b"*":
+        return True
+
+    opaque = strip_weak(etag)
+
+    return any(
+        strip_weak(candidate.strip()) == opaque
+        for candidate in if_none_match.split(b",")
+    )
+
+
+def strip_weak(etag: bytes) -> bytes:
+    return etag[2:] if etag.startswith(b"W/") else etag
@@ -0,0 +1,407 @@
+import asyncio
+import traceback
+from contextlib import asynccontextmanager
+from contextlib import contextmanager
+from typing import Any
+from typing import AsyncIterator
+from typing import Callable
+from typing import Dict
+from typing import Iterator
+from typing import Optional
+from typing import Tuple
+
+import asyncpg
+from asyncpg.prepared_stmt import PreparedStatement
+
+from framework.config import settings
+from framework.logging import get_logger
+from main.deadline import DeadlineExceededError
+from main.deadline import get_timeout
+from main.deadline import is_expired
+from main.metrics import PHASE_SECONDS
+from main.metrics import Counter
+from main.metrics import Gauge
+
+logger = get_logger("db")
+
+
+class DbUnavailableError(Exception):
+    pass
+
+
+class DbConnection(asyncpg.Connection):
+    """
+    Keeps the statements prepared on it by StatementRegistry.
+    They live as long as the connection: the pool reset on release
+    does not deallocate prepared statements.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.prepared_statements: Dict[str, PreparedStatement] = {}
+
+
+class StatementRegistry:
+    """
+    Known queries, prepared once per connection, not once per request.
+    The pool init hook prepares all of them on every new connection,
+    including the ones which replace recycled connections.
+    A connection without them yet prepares a statement on its first use.
+    """
+
+    def __init__(self) -> None:
+        self.executes: Dict[str, int] = {}
+        self.prepares: Dict[str, int] = {}
+        self.queries: Dict[str, str] = {}
+
+    def register(self, name: str, query: str) -> str:
+        self.executes[name] = 0
+        self.prepares[name] = 0
+        self.queries[name] = query
+
+        Counter(
+            f"exlibris_db_statement_{name}_prepares_total",
+            f"Number of times the {name} statement was prepared",
+            lambda: self.prepares[name],
+        )
+        Counter(
+            f"exlibris_db_statement_{name}_executes_total",
+            f"Number of times the {name} statement was executed",
+            lambda: self.executes[name],
+        )
+
+        return name
+
+    async def prepare_all(self, conn: asyncpg.Connection) -> None:
+        for name in self.queries:
+            await self.prepare(conn, name)
+
+    async def prepare(
+        self,
+        conn: asyncpg.Connection,
+        name: str,
+    ) -> PreparedStatement:
+        stmt = await conn.prepare(self.queries[name])
+        self.prepares[name] += 1
+
+        prepared = getattr(conn, "prepared_statements", None)
+        if prepared is not None:
+            prepared[name] = stmt
+
+        return stmt
+
+    async def get(
+        self,
+        conn: asyncpg.Connection,
+        name: str,
+    ) -> PreparedStatement:
+        """
+        The statement prepared on the connection, to be executed once.
+        """
+
+        prepared = getattr(conn, "prepared_statements", None) or {}
+        stmt = prepared.get(name)
+        if stmt is None:
+            stmt = await self.prepare(conn, name)
+
+        self.executes[name] += 1
+
+        return stmt
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {
+            name: {
+                "executes": self.executes[name],
+                "prepares": self.prepares[name],
+            }
+            for name in self.queries
+        }
+
+
+DB_LISTENER_RETRY_MAX = 30.0
+DB_LISTENER_RETRY_MIN = 1.0
+
+_listen: Optional[Tuple[str, Callable]] = None
+_listener: Optional[asyncpg.Connection] = None
+_listener_task: Optional["asyncio.Task[None]"] = None
+_pool: Optional[asyncpg.Pool] = None
+_pool_enabled = False
+_pool_lock: Optional[asyncio.Lock] = None
+
+statements = StatementRegistry()
+
+
+def get_db_pool() -> Optional[asyncpg.Pool]:
+    return _pool
+
+
+def get_db_pool_size() -> Optional[int]:
+    return _pool.get_size() if _pool is not None else None
+
+
+def get_db_pool_idle_size() -> Optional[int]:
+    return _pool.get_idle_size() if _pool is not None else None
+
+
+Gauge(
+    "exlibris_db_pool_size",
+    "Number of connections in the db pools",
+    get_db_pool_size,
+)
+Gauge(
+    "exlibris_db_pool_idle_size",
+    "Number of idle connections in the db pools",
+    get_db_pool_idle_size,
+)
+
+
+async def open_db_pool() -> asyncpg.Pool:
+    """
+    Creates the connection pool of the current worker process.
+    Each gunicorn worker runs its own lifespan, hence owns its own pool.
+    If it fails, e.g. the DB is down at startup,
+    the pool is opened again on the next acquire.
+    """
+
+    global _pool, _pool_enabled
+
+    _pool_enabled = True
+
+    if _pool is None:
+        _pool = await asyncpg.create_pool(
+            settings.DATABASE_URL,
+            **get_connect_kwargs(),
+            init=statements.prepare_all,
+            max_inactive_connection_lifetime=(
+                settings.DB_POOL_MAX_INACTIVE_CONNECTION_LIFETIME
+            ),
+            max_size=settings.DB_POOL_MAX_SIZE,
+            min_size=settings.DB_POOL_MIN_SIZE,
+        )
+        logger.debug(
+            "db pool is open: min_size=%s, max_size=%s",
+            settings.DB_POOL_MIN_SIZE,
+            settings.DB_POOL_MAX_SIZE,
+        )
+
+    return _pool
+
+
+async def close_db_pool() -> None:
+    global _pool, _pool_enabled
+
+    _pool_enabled = False
+
+    pool, _pool = _pool, None
+    if pool is not None:
+        await pool.close()
+        logger.debug("db pool is closed")
+
+
+async def open_db_listener(
+    channel: str,
+    callback: Callable,
+) -> Optional[asyncpg.Connection]:
+    """
+    Opens a dedicated connection which LISTENs on the channel.
+    The callback is called on every NOTIFY:
+    callback(connection, pid, channel, payload).
+
+    If the connection cannot be opened or is lost (e.g. a DB restart),
+    it is reopened in the background with backoff, and then
+    the callback is called once, as NOTIFYs may have been missed.
+    Meanwhile only the TTL expires the cache.
+    """
+
+    global _listen, _listener
+
+    _listen = (channel, callback)
+
+    if _listener is None:
+        try:
+            _listener = await connect_db_listener(channel, callback)
+        except (OSError, asyncio.TimeoutError, asyncpg.PostgresError):
+            logger.error(traceback.format_exc())
+            start_db_listener_reconnect()
+
+    return _listener
+
+
+async def connect_db_listener(
+    channel: str,
+    callback: Callable,
+) -> asyncpg.Connection:
+    conn = await asyncpg.connect(
+        settings.DATABASE_URL,
+        **get_connect_kwargs(),
+    )
+    await conn.add_listener(channel, callback)
+    conn.add_termination_listener(on_db_listener_terminated)
+    logger.debug("listening on channel %r", channel)
+
+    return conn
+
+
+def on_db_listener_terminated(conn: asyncpg.Connection) -> None:
+    global _listener
+
+    if conn is not _listener:
+        return
+
+    _listener = None
+    logger.error("db listener connection has been lost")
+    start_db_listener_reconnect()
+
+
+def start_db_listener_reconnect() -> None:
+    global _listener_task
+
+    if _listen is None or _listener_task is not None:
+        return
+
+    _listener_task = asyncio.ensure_future(reconnect_db_listener())
+
+
+async def reconnect_db_listener() -> None:
+    global _listener, _listener_task
+
+    delay = DB_LISTENER_RETRY_MIN
+
+    try:
+        while _listen is not None and _listener is None:
+            await asyncio.sleep(delay)
+            channel, callback = _listen
+            try:
+                _listener = await connect_db_listener(channel, callback)
+            except (OSError, asyncio.TimeoutError, asyncpg.PostgresError):
+                logger.debug("unable to reconnect db listener")
+                delay = min(delay * 2, DB_LISTENER_RETRY_MAX)
+                continue
+
+            callback(_listener, None, channel, None)
+    finally:
+        if _listener_task is asyncio.current_task():
+            _listener_task = None
+
+
+async def close_db_listener() -> None:
+    global _listen, _listener, _listener_task
+
+    _listen = None
+
+    task, _listener_task = _listener_task, None
+    if task is not None:
+        task.cancel()
+
+    conn, _listener = _listener, None
+    if conn is not None:
+        await conn.close()
+        logger.debug("db listener is closed")
+
+
+@asynccontextmanager
+async def get_db_connection() -> AsyncIterator:
+    """
+    Yields a connection from the pool when it is open.
+    Falls back to a dedicated connection otherwise (lifespan off, tests).
+    """
+
+    pool: Optional[asyncpg.Pool] = None
+    conn: Optional[asyncpg.Connection] = None
+    try:
+        with PHASE_SECONDS.time("db_acquire"):
+            pool = await ensure_db_pool()
+            conn = await acquire_db_connection(pool)
+        yield conn
+    except Exception:
+        logger.error(traceback.format_exc())
+        raise
+    finally:
+        if conn is not None:
+            if pool is not None:
+                await pool.release(conn)
+            else:
+                await conn.close()
+
+
+def get_connect_kwargs() -> Dict[str, Any]:
+    """
+    Connections never outlive a request:
+    connecting is bounded by REQUEST_TIMEOUT,
+    and so is every statement, server-side (statement_timeout),
+    which holds across the pool reset on release.
+    """
+
+    statement_timeout = int(settings.REQUEST_TIMEOUT * 1000)
+
+    kwargs = {
+        "connection_class": DbConnection,
+        "server_settings": {"statement_timeout": str(statement_timeout)},
+        "timeout": float(settings.REQUEST_TIMEOUT),
+    }
+
+    return kwargs
+
+
+async def ensure_db_pool() -> Optional[asyncpg.Pool]:
+    """
+    The pool, opened again if it has failed to open before.
+    None when there is no pool to use (lifespan off, tests).
+    Raises the same errors as acquire_db_connection.
+    """
+
+    global _pool_lock
+
+    if _pool is not None or not _pool_enabled:
+        return _pool
+
+    if _pool_lock is None:
+        _pool_lock = asyncio.Lock()
+
+    async def open_once() -> asyncpg.Pool:
+        assert _pool_lock is not None
+        async with _pool_lock:
+            return await open_db_pool()
+
+    with translate_connect_errors("opening db pool"):
+        return await asyncio.wait_for(open_once(), get_timeout())
+
+
+async def acquire_db_connection(
+    pool: Optional[asyncpg.Pool],
+) -> asyncpg.Connection:
+    """
+    Raises DbUnavailableError when the pool is exhausted
+    or the DB does not accept connections,
+    DeadlineExceededError when the request deadline passes first.
+    """
+
+    with translate_connect_errors("acquiring db connection"):
+        if pool is None:
+            kwargs = get_connect_kwargs()
+            kwargs["timeout"] = get_timeout(kwargs["timeout"])
+            return await asyncpg.connect(settings.DATABASE_URL, **kwargs)
+
+        return await pool.acquire(
+            timeout=get_timeout(settings.DB_POOL_ACQUIRE_TIMEOUT)
+        )
+
+
+@contextmanager
+def translate_connect_errors(action: str) -> Iterator[None]:
+    try:
+        yield
+
+    except asyncio.TimeoutError as err:
+        if is_expired():
+            raise DeadlineExceededError(
+                f"request deadline exceeded {action}"
+            ) from err
+        raise DbUnavailableError(f"timed out {action}") from err
+
+    except (
+        OSError,
+        asyncpg.CannotConnectNowError,
+        asyncpg.TooManyConnectionsError,
+    ) as err:
+        raise DbUnavailableError(f"unable to connect to db: {err}") from err
@@ -0,0 +1,65 @@
+"""
+Per-request deadline.
+
+It is set once per request and is seen, through a context variable,
+by everything the request awaits, tasks spawned by it included:
+no DB connect, pool acquire or query waits longer than the time left.
+A task shared by several requests sets a deadline of its own.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+from typing import Optional
+
+_deadline: ContextVar[Optional[float]] = ContextVar("deadline", default=None)
+
+
+class DeadlineExceededError(Exception):
+    pass
+
+
+@contextmanager
+def deadline_scope(timeout: float) -> Iterator[None]:
+    token = _deadline.set(time.monotonic() + timeout)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def get_remaining() -> Optional[float]:
+    """
+    Seconds left till the deadline, None if there is no deadline.
+    """
+
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+
+    return deadline - time.monotonic()
+
+
+def is_expired() -> bool:
+    remaining = get_remaining()
+    return remaining is not None and remaining <= 0
+
+
+def get_timeout(limit: Optional[float] = None) -> Optional[float]:
+    """
+    Timeout of a wait: the limit bounded by the time left.
+    Raises DeadlineExceededError when there is no time left.
+    """
+
+    remaining = get_remaining()
+    if remaining is None:
+        return limit
+
+    if remaining <= 0:
+        raise DeadlineExceededError("request deadline exceeded")
+
+    if limit is None:
+        return remaining
+
+    return min(limit, remaining)
@@ -0,0 +1,137 @@
+import abc
+import json
+from typing import Any
+from typing import Dict
+from typing import Iterable
+from typing import Optional
+from typing import Tuple
+
+from pydantic.json import pydantic_encoder
+
+from framework.config import settings
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore
+
+INDENT = 2
+
+
+class Encoder(abc.ABC):
+    """
+    Serializes JSON-compatible objects into bytes, always with sorted keys.
+    Indented output uses INDENT spaces, compact output has no whitespace.
+    """
+
+    name: str = ""
+
+    def __init__(self, *, compact: bool = False) -> None:
+        self.compact = compact
+
+    @property
+    def indent(self) -> Optional[int]:
+        return None if self.compact else INDENT
+
+    @property
+    def key(self) -> str:
+        return f"{self.name}{'-compact' if self.compact else ''}"
+
+    @abc.abstractmethod
+    def dumps(self, obj: Any) -> bytes:
+        raise NotImplementedError
+
+
+class StdlibEncoder(Encoder):
+    name = "stdlib"
+
+    def dumps(self, obj: Any) -> bytes:
+        separators = (",", ":") if self.compact else None
+
+        dump = json.dumps(
+            obj,
+            default=pydantic_encoder,
+            indent=self.indent,
+            separators=separators,
+            sort_keys=True,
+        )
+
+        return dump.encode()
+
+
+class OrjsonEncoder(Encoder):
+    name = "orjson"
+
+    def dumps(self, obj: Any) -> bytes:
+        option = orjson.OPT_SORT_KEYS
+        if not self.compact:
+            option |= orjson.OPT_INDENT_2
+
+        dump: bytes = orjson.dumps(
+            obj,
+            default=pydantic_encoder,
+            option=option,
+        )
+
+        return dump
+
+
+ENCODERS: Dict[Tuple[str, bool], Encoder] = {
+    (encoder_cls.name, compact): encoder_cls(compact=compact)
+    for encoder_cls in (OrjsonEncoder, StdlibEncoder)
+    for compact in (False, True)
+    if encoder_cls is not OrjsonEncoder or orjson is not None
+}
+
+
+def get_encoder(*, compact: Optional[bool] = None) -> Encoder:
+    """
+    Returns the encoder configured with JSON_ENCODER.
+    The default stdlib backend is byte-identical to PayloadT.json();
+    orjson is opt-in: it writes non-ASCII as is, not as \\u escapes.
+    The "auto" backend is orjson when installed, stdlib otherwise.
+    """
+
+    backend: str = settings.JSON_ENCODER
+    if backend == "auto":
+        backend = OrjsonEncoder.name if orjson is not None else "stdlib"
+    if (backend, False) not in ENCODERS:
+        backend = StdlibEncoder.name
+
+    if compact is None:
+        compact = settings.JSON_COMPACT
+
+    return ENCODERS[(backend, compact)]
+
+
+def negotiate_encoder(headers: Iterable[Tuple[bytes, bytes]]) -> Encoder:
+    """
+    Picks the encoder with respect to the Accept header of the request:
+    "application/json; indent=0" asks for compact output,
+    any other indent asks for the indented one.
+    Without the indent parameter JSON_COMPACT applies.
+    """
+
+    compact: Optional[bool] = None
+
+    for name, value in headers:
+        if name.lower() == b"accept":
+            compact = parse_accept_compact(value.decode("latin-1"))
+
+    return get_encoder(compact=compact)
+
+
+def parse_accept_compact(accept: str) -> Optional[bool]:
+    compact: Optional[bool] = None
+
+    for media_range in accept.split(","):
+        media_type, *params = media_range.split(";")
+        if media_type.strip() not in {"application/json", "*/*"}:
+            continue
+
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip() == "indent":
+                compact = value.strip() == "0"
+
+    return compact
@@ -0,0 +1,397 @@
+"""
+Hot-path metrics in Prometheus text exposition format.
+
+Each process keeps its own metrics in memory.
+When METRICS_DIR is set, every process (gunicorn worker) flushes them
+into its own file there, and the exposition aggregates all the files:
+histograms and counters of all processes ever run,
+gauges of the live ones only.
+Files of dead processes are folded into one,
+so that recycled workers do not pile them up.
+The files are written, locked and read in a thread, off the event loop.
+"""
+
+import asyncio
+import fcntl
+import json
+import os
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Tuple
+from typing import TypeVar
+from typing import Union
+
+from framework.config import settings
+
+T = TypeVar("T")
+
+CONTENT_TYPE = b"text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        *,
+        label: str,
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> None:
+        self.buckets = buckets
+        self.documentation = documentation
+        self.label = label
+        self.name = name
+        self.series: Dict[str, Dict] = {}
+
+        REGISTRY[name] = self
+
+    def observe(self, value: float, label_value: str) -> None:
+        series = self.series.get(label_value)
+        if series is None:
+            series = self.series[label_value] = {
+                "buckets": [0] * (len(self.buckets) + 1),
+                "count": 0,
+                "sum": 0.0,
+            }
+
+        series["buckets"][bisect_left(self.buckets, value)] += 1
+        series["count"] += 1
+        series["sum"] += value
+
+    @contextmanager
+    def time(self, label_value: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, label_value)
+
+
+class Gauge:
+    """
+    The value is collected by the callback at exposition time.
+    The callback returns None when there is nothing to report.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        collect: Callable[[], Optional[float]],
+    ) -> None:
+        self.collect = collect
+        self.documentation = documentation
+        self.name = name
+
+        REGISTRY[name] = self
+
+
+class Counter(Gauge):
+    """
+    A gauge which only grows: the number of events since the start.
+    Totals keep the final values of the dead processes,
+    so that they do not drop when a worker is recycled.
+    """
+
+
+REGISTRY: Dict[str, Union[Gauge, Histogram]] = {}
+
+PHASE_SECONDS = Histogram(
+    "exlibris_phase_seconds",
+    "Time spent per request processing phase",
+    label="phase",
+)
+
+# histograms and counters of the dead processes
+ARCHIVE_NAME = "dead.json"
+
+_flushing = False
+_last_flush = 0.0
+
+
+def collect() -> Dict:
+    state: Dict = {"counters": {}, "gauges": {}, "histograms": {}}
+
+    for name, metric in REGISTRY.items():
+        if isinstance(metric, Histogram):
+            state["histograms"][name] = metric.series
+        else:
+            value = metric.collect()
+            if value is not None:
+                kind = "counters" if isinstance(metric, Counter) else "gauges"
+                state[kind][name] = value
+
+    return state
+
+
+def get_metrics_dir() -> Optional[Path]:
+    if not settings.METRICS_DIR:
+        return None
+
+    return Path(settings.METRICS_DIR)
+
+
+async def flush(*, force: bool = False) -> None:
+    """
+    Writes metrics of this process into METRICS_DIR,
+    at most once per METRICS_FLUSH_INTERVAL unless forced,
+    and never while the previous write is still in progress.
+    """
+
+    global _flushing, _last_flush
+
+    metrics_dir = get_metrics_dir()
+    if metrics_dir is None:
+        return
+
+    now = time.monotonic()
+    if not force and (
+        _flushing or now - _last_flush < settings.METRICS_FLUSH_INTERVAL
+    ):
+        return
+    _last_flush = now
+
+    # serialized on the loop: the metrics change while the thread writes
+    data = json.dumps(collect())
+
+    _flushing = True
+    try:
+        await run_in_thread(write_process_state, metrics_dir, data)
+    finally:
+        _flushing = False
+
+
+async def run_in_thread(func: Callable[..., T], *args: Any) -> T:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, func, *args)
+
+
+def write_process_state(metrics_dir: Path, data: str) -> None:
+    metrics_dir.mkdir(parents=True, exist_ok=True)
+    write_state(metrics_dir / f"{os.getpid()}.json", data)
+
+
+def read_state(path: Path) -> Optional[Dict]:
+    try:
+        state: Dict = json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+
+    return state
+
+
+def write_state(path: Path, data: str) -> None:
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_text(data)
+    os.replace(tmp, path)
+
+
+def clear_metrics_dir() -> None:
+    metrics_dir = get_metrics_dir()
+    if metrics_dir is None or not metrics_dir.is_dir():
+        return
+
+    for path in metrics_dir.glob("*.json"):
+        path.unlink()
+
+
+def is_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+    return True
+
+
+async def aggregate() -> Dict:
+    metrics_dir = get_metrics_dir()
+    if metrics_dir is None:
+        return collect()
+
+    data = json.dumps(collect())
+
+    total: Dict = await run_in_thread(aggregate_files, metrics_dir, data)
+
+    return total
+
+
+def aggregate_files(metrics_dir: Path, data: str) -> Dict:
+    """
+    Blocks on the file lock: runs in a thread.
+    """
+
+    write_process_state(metrics_dir, data)
+
+    total: Dict = {"counters": {}, "gauges": {}, "histograms": {}}
+
+    with lock_metrics_dir(metrics_dir):
+        archive_dead(metrics_dir)
+
+        for path in metrics_dir.glob("*.json"):
+            state = read_state(path)
+            if state is None:
+                continue
+
+            if path.name != ARCHIVE_NAME:
+                merge_values(total["gauges"], state["gauges"])
+
+            merge_values(total["counters"], state.get("counters", {}))
+
+            for name, series in state["histograms"].items():
+                merge_histogram(
+                    total["histograms"].setdefault(name, {}),
+                    series,
+                )
+
+    return total
+
+
+@contextmanager
+def lock_metrics_dir(metrics_dir: Path) -> Iterator[None]:
+    """
+    Serializes aggregations of the processes which are scraped at once.
+    """
+
+    with (metrics_dir / ".lock").open("a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        yield
+
+
+def archive_dead(metrics_dir: Path) -> None:
+    """
+    Merges histograms and counters of the dead processes
+    into the archive file and removes their files.
+    Gauges of the dead processes are dropped.
+    """
+
+    dead = [
+        path
+        for path in metrics_dir.glob("*.json")
+        if path.stem.isdigit() and not is_alive(int(path.stem))
+    ]
+    if not dead:
+        return
+
+    archive_path = metrics_dir / ARCHIVE_NAME
+    archive = read_state(archive_path) or {}
+    archive.setdefault("counters", {})
+    archive.setdefault("gauges", {})
+    archive.setdefault("histograms", {})
+
+    for path in dead:
+        state = read_state(path) or {"histograms": {}}
+        merge_values(archive["counters"], state.get("counters", {}))
+        for name, series in state["histograms"].items():
+            merge_histogram(archive["histograms"].setdefault(name, {}), series)
+
+    write_state(archive_path, json.dumps(archive))
+
+    for path in dead:
+        path.unlink()
+
+
+def merge_values(total: Dict[str, float], values: Dict[str, float]) -> None:
+    for name, value in values.items():
+        total[name] = total.get(name, 0) + value
+
+
+def merge_histogram(total: Dict[str, Dict], series: Dict[str, Dict]) -> None:
+    for label_value, values in series.items():
+        acc = total.get(label_value)
+        if acc is None:
+            total[label_value] = {
+                "buckets": list(values["buckets"]),
+                "count": values["count"],
+                "sum": values["sum"],
+            }
+            continue
+
+        acc["buckets"] = [
+            a + b for a, b in zip(acc["buckets"], values["buckets"])
+        ]
+        acc["count"] += values["count"]
+        acc["sum"] += values["sum"]
+
+
+def render(state: Dict) -> bytes:
+    lines: List[str] = []
+
+    for name, metric in REGISTRY.items():
+        lines.append(f"# HELP {name} {metric.documentation}")
+
+        if isinstance(metric, Histogram):
+            lines.append(f"# TYPE {name} histogram")
+            series = state["histograms"].get(name, {})
+            for label_value in sorted(series):
+                lines.extend(
+                    render_histogram(metric, label_value, series[label_value])
+                )
+        else:
+            lines.extend(render_value(metric, state))
+
+    return ("\n".join(lines) + "\n").encode()
+
+
+def render_value(metric: Gauge, state: Dict) -> List[str]:
+    name = metric.name
+    kind = "counter" if isinstance(metric, Counter) else "gauge"
+    values = state[f"{kind}s"]
+
+    lines = [f"# TYPE {name} {kind}"]
+    if name in values:
+        lines.append(f"{name} {values[name]}")
+
+    return lines
+
+
+def render_histogram(
+    metric: Histogram,
+    label_value: str,
+    values: Dict,
+) -> List[str]:
+    name = metric.name
+    label = f'{metric.label}="{label_value}"'
+
+    lines = []
+    cumulative = 0
+    bounds = [str(bound) for bound in metric.buckets] + ["+Inf"]
+    for bound, count in zip(bounds, values["buckets"]):
+        cumulative += count
+        lines.append(f'{name}_bucket{{{label},le="{bound}"}} {cumulative}')
+
+    lines.append(f"{name}_sum{{{label}}} {values['sum']}")
+    lines.append(f"{name}_count{{{label}}} {values['count']}")
+
+    return lines
+
+
+async def expose() -> bytes:
+    return render(await aggregate())
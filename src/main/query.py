@@ -0,0 +1,106 @@
+from typing import Dict
+from typing import NamedTuple
+from typing import Optional
+from typing import Tuple
+from urllib.parse import parse_qsl
+
+from main.custom_types import DbSetting
+
+DB_SETTING_FIELDS = tuple(DbSetting.__fields__)
+
+
+class InvalidQueryError(ValueError):
+    pass
+
+
+class SettingsQuery(NamedTuple):
+    """
+    Selection of db settings by the query string:
+        ?name=work_mem,shared_buffers  exact names, case-insensitive
+        ?prefix=autovacuum             names starting with the prefix
+        ?fields=name,setting           projection of every setting
+    Names and prefix are lowercased. Empty values are treated as absent.
+    Hashable, to be a cache key.
+    """
+
+    fields: Optional[Tuple[str, ...]] = None
+    names: Optional[Tuple[str, ...]] = None
+    prefix: Optional[str] = None
+
+    def matches(self, name: str) -> bool:
+        name = name.lower()
+
+        if self.names is not None and name not in self.names:
+            return False
+
+        return self.prefix is None or name.startswith(self.prefix)
+
+    def project(self, db_setting: Dict) -> Dict:
+        if self.fields is None:
+            return db_setting
+
+        return {field: db_setting[field] for field in self.fields}
+
+
+def parse_settings_query(query_string: bytes) -> Optional[SettingsQuery]:
+    """
+    None when the query string does not select anything,
+    so that the whole snapshot is served as is.
+    """
+
+    if not query_string:
+        return None
+
+    params: Dict[str, str] = {}
+    for key, value in parse_qsl(query_string.decode("latin-1")):
+        if key in {"fields", "name", "prefix"}:
+            params[key] = f"{params[key]},{value}" if key in params else value
+
+    if not params:
+        return None
+
+    fields = parse_fields(params.get("fields"))
+
+    names = split_list(params.get("name"))
+    if names is not None:
+        names = tuple(dict.fromkeys(name.lower() for name in names))
+
+    prefix = params.get("prefix", "").strip()
+
+    query = SettingsQuery(
+        fields=fields,
+        names=names,
+        prefix=prefix.lower() or None,
+    )
+
+    if query == SettingsQuery():
+        return None
+
+    return query
+
+
+def parse_fields(value: Optional[str]) -> Optional[Tuple[str, ...]]:
+    fields = split_list(value)
+    if fields is None:
+        return None
+
+    unknown = sorted(set(fields) - set(DB_SETTING_FIELDS))
+    if unknown:
+        raise InvalidQueryError(f"unknown fields: {', '.join(unknown)}")
+
+    # in the order of the model, which is the order of sorted keys
+    return tuple(field for field in DB_SETTING_FIELDS if field in fields)
+
+
+def split_list(value: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """
+    None when there are no items: "?name=," selects nothing by name,
+    rather than selecting no settings at all.
+    """
+
+    if value is None:
+        return None
+
+    items = tuple(item.strip() for item in value.split(",") if item.strip())
+
+    return items or None
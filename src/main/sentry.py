@@ -0,0 +1,65 @@
+from typing import Callable
+from typing import Dict
+
+import sentry_sdk
+
+from framework.config import settings
+
+
+def traces_sampler(sampling_context: Dict) -> float:
+    """
+    Sample rate of a transaction by its request path:
+    errors (/e*) are always traced, metrics scrapes never,
+    everything else with SENTRY_TRACES_SAMPLE_RATE.
+    A decision of the parent transaction is respected.
+    """
+
+    parent_sampled = sampling_context.get("parent_sampled")
+    if parent_sampled is not None:
+        return float(parent_sampled)
+
+    scope = sampling_context.get("asgi_scope") or {}
+    path = scope.get("path", "")
+
+    if path == settings.METRICS_PATH:
+        return 0.0
+
+    if path.startswith("/e"):
+        return settings.SENTRY_TRACES_SAMPLE_RATE_ERRORS
+
+    return settings.SENTRY_TRACES_SAMPLE_RATE
+
+
+def init_sentry() -> bool:
+    """
+    Initializes Sentry if SENTRY_DSN is set.
+    Returns whether it has been initialized.
+    """
+
+    if not settings.SENTRY_DSN:
+        return False
+
+    sentry_sdk.init(
+        settings.SENTRY_DSN,
+        traces_sampler=traces_sampler,
+    )
+
+    return True
+
+
+def instrument_application(application: Callable) -> Callable:
+    """
+    Wraps the ASGI application into the Sentry middleware if Sentry
+    is initialized: it starts a transaction per request,
+    which traces_sampler samples by the ASGI scope of the request.
+    """
+
+    if not init_sentry():
+        return application
+
+    # not imported unless Sentry is on
+    from sentry_sdk.integrations.asgi import SentryAsgiMiddleware
+
+    instrumented: Callable = SentryAsgiMiddleware(application)
+
+    return instrumented
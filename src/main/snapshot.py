@@ -0,0 +1,210 @@
+import hashlib
+import json
+from bisect import bisect_left
+from itertools import islice
+from itertools import takewhile
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from main.compression import Precompressed
+from main.custom_types import DbSetting
+from main.custom_types import PayloadT
+from main.encoders import Encoder
+from main.query import SettingsQuery
+
+# selections cached per snapshot, the oldest one is evicted first
+MAX_SELECTED_BLOCKS = 128
+
+
+class DbSettingsSnapshot:
+    """
+    Immutable result of one pg_settings fetch.
+    A new snapshot is built per cache generation,
+    so everything derived from it is computed at most once per generation.
+    """
+
+    def __init__(self, db_settings: List[DbSetting]) -> None:
+        self.db_settings = db_settings
+        self._etag: Optional[bytes] = None
+        self._json_blocks: Dict[str, bytes] = {}
+        self._precompressed: Dict[Tuple[str, str], Precompressed] = {}
+        self._selected_blocks: Dict[Tuple[SettingsQuery, str], bytes] = {}
+
+        # the indexes are built on the first selection
+        self._by_name: Optional[Dict[str, DbSetting]] = None
+        self._sorted_names: List[str] = []
+
+    @property
+    def etag(self) -> bytes:
+        """
+        Weak entity tag: a digest of db_settings only.
+        The rest of the payload echoes the request,
+        and the encoders differ in whitespace only.
+        """
+
+        if self._etag is None:
+            canonical = json.dumps(
+                [db_setting.dict() for db_setting in self.db_settings],
+                separators=(",", ":"),
+                sort_keys=True,
+            )
+            digest = hashlib.blake2b(canonical.encode(), digest_size=16)
+            self._etag = f'W/"{digest.hexdigest()}"'.encode()
+
+        return self._etag
+
+    def json_block(self, encoder: Encoder) -> bytes:
+        """
+        The db_settings list, serialized by the encoder as it appears
+        at the first nesting level of the payload.
+        """
+
+        block = self._json_blocks.get(encoder.key)
+        if block is None:
+            block = dump_block(
+                [db_setting.dict() for db_setting in self.db_settings],
+                encoder,
+            )
+            self._json_blocks[encoder.key] = block
+
+        return block
+
+    def precompressed(self, encoder: Encoder, encoding: str) -> Precompressed:
+        """
+        The cacheable beginning of the payload, compressed:
+        the head and the db_settings block.
+        """
+
+        key = (encoder.key, encoding)
+        precompressed = self._precompressed.get(key)
+        if precompressed is None:
+            prefix = dump_payload_head(encoder) + self.json_block(encoder)
+            precompressed = Precompressed(encoding, prefix)
+            self._precompressed[key] = precompressed
+
+        return precompressed
+
+    def selected_block(self, query: SettingsQuery, encoder: Encoder) -> bytes:
+        """
+        Like json_block(), but of the selected db settings only.
+        """
+
+        key = (query, encoder.key)
+        block = self._selected_blocks.get(key)
+        if block is None:
+            block = dump_block(self.select(query), encoder)
+
+            if len(self._selected_blocks) >= MAX_SELECTED_BLOCKS:
+                self._selected_blocks.pop(next(iter(self._selected_blocks)))
+            self._selected_blocks[key] = block
+
+        return block
+
+    def select(self, query: SettingsQuery) -> List[Dict]:
+        """
+        Db settings matching the query, projected to its fields.
+        Names are looked up in a hash index, the prefix is looked up
+        in the sorted index of names.
+        """
+
+        by_name = self._get_by_name()
+        prefix = query.prefix
+
+        names: Iterable[str] = self._sorted_names
+        if query.names is not None:
+            # in the order of pg_settings, like the full list
+            names = sorted(name for name in query.names if name in by_name)
+            if prefix is not None:
+                names = [name for name in names if name.startswith(prefix)]
+        elif prefix is not None:
+            start = bisect_left(self._sorted_names, prefix)
+            names = takewhile(
+                lambda name: name.startswith(prefix),
+                islice(self._sorted_names, start, None),
+            )
+
+        return [query.project(by_name[name].dict()) for name in names]
+
+    def _get_by_name(self) -> Dict[str, DbSetting]:
+        if self._by_name is None:
+            self._by_name = {
+                db_setting.name.lower(): db_setting
+                for db_setting in self.db_settings
+            }
+            self._sorted_names = sorted(self._by_name)
+
+        return self._by_name
+
+
+def dump_block(items: List[Dict], encoder: Encoder) -> bytes:
+    """
+    The list of items, serialized by the encoder as it appears
+    at the first nesting level of the payload.
+    """
+
+    block = encoder.dumps(items)
+
+    # JSON strings never contain a raw newline,
+    # so each newline starts a line which must be nested one level
+    if encoder.indent:
+        block = block.replace(b"\n", b"\n" + b" " * encoder.indent)
+
+    return block
+
+
+def dump_payload(
+    payload: PayloadT,
+    snapshot: DbSettingsSnapshot,
+    encoder: Encoder,
+    query: Optional[SettingsQuery] = None,
+) -> bytes:
+    """
+    Serializes the payload with the pre-serialized db_settings of the snapshot.
+    Only the per-request part is encoded here.
+    The query, if any, selects the db_settings to include.
+    With the stdlib encoder the output is byte-identical
+    to PayloadT.json(sort_keys=True, indent=2).
+    """
+
+    if query is None:
+        block = snapshot.json_block(encoder)
+    else:
+        block = snapshot.selected_block(query, encoder)
+
+    body = b"".join(
+        (
+            dump_payload_head(encoder),
+            block,
+            dump_payload_tail(payload, encoder),
+        )
+    )
+
+    return body
+
+
+def dump_payload_head(encoder: Encoder) -> bytes:
+    """
+    The beginning of the payload up to the db_settings value.
+    db_settings goes first in sorted keys.
+    """
+
+    head = encoder.dumps({"db_settings": []})
+    head = head[: head.index(b"[]")]
+
+    return head
+
+
+def dump_payload_tail(payload: PayloadT, encoder: Encoder) -> bytes:
+    """
+    The rest of the payload after the db_settings value.
+    """
+
+    rest = encoder.dumps(payload.dict(exclude={"db_settings"}))
+
+    # the rest continues the object: "{" becomes the separator
+    tail = b"," + rest[1:]
+
+    return tail
@@ -0,0 +1,111 @@
+from typing import AsyncIterator
+from typing import Callable
+from typing import List
+from typing import Optional
+from typing import TypeVar
+
+from main.custom_types import DbSetting
+from main.custom_types import PayloadT
+from main.encoders import Encoder
+from main.query import SettingsQuery
+from main.snapshot import dump_payload_head
+from main.snapshot import dump_payload_tail
+
+T = TypeVar("T")
+
+
+async def stream_payload(
+    payload: PayloadT,
+    db_settings: AsyncIterator[DbSetting],
+    encoder: Encoder,
+    query: Optional[SettingsQuery] = None,
+) -> AsyncIterator[bytes]:
+    """
+    Yields the payload piece by piece, one piece per db setting.
+    Pieces join into the same bytes as dump_payload() produces.
+    The query, if any, filters and projects db settings on the fly.
+    """
+
+    indent = encoder.indent or 0
+    item_sep = b"\n" + b" " * (2 * indent) if indent else b""
+    list_end = b"\n" + b" " * indent if indent else b""
+
+    yield dump_payload_head(encoder)
+
+    empty = True
+    async for db_setting in db_settings:
+        if query is None:
+            item = encoder.dumps(db_setting.dict())
+        elif query.matches(db_setting.name):
+            item = encoder.dumps(query.project(db_setting.dict()))
+        else:
+            continue
+
+        if indent:
+            item = item.replace(b"\n", item_sep)
+
+        yield b"".join((b"[" if empty else b",", item_sep, item))
+        empty = False
+
+    yield b"[]" if empty else list_end + b"]"
+
+    yield dump_payload_tail(payload, encoder)
+
+
+async def send_chunked(
+    send: Callable,
+    pieces: AsyncIterator[bytes],
+    chunk_size: int,
+) -> None:
+    """
+    Sends pieces as http.response.body messages with more_body=True,
+    gathering them into chunks of at least chunk_size bytes.
+    The last message is an empty one which ends the body.
+    """
+
+    chunk = bytearray()
+
+    async for piece in pieces:
+        chunk += piece
+        if len(chunk) >= chunk_size:
+            await send(
+                {
+                    "body": bytes(chunk),
+                    "more_body": True,
+                    "type": "http.response.body",
+                }
+            )
+            chunk.clear()
+
+    await send(
+        {
+            "body": bytes(chunk),
+            "more_body": False,
+            "type": "http.response.body",
+        }
+    )
+
+
+async def prefetch(items: AsyncIterator[T]) -> AsyncIterator[T]:
+    """
+    Awaits the first item, so that the failure to get it is raised here,
+    and returns the iterator of all the items, that first one included.
+    """
+
+    try:
+        first = await items.__anext__()
+    except StopAsyncIteration:
+        return aiter_items([])
+
+    return chain_items(first, items)
+
+
+async def aiter_items(items: List[T]) -> AsyncIterator[T]:
+    for item in items:
+        yield item
+
+
+async def chain_items(first: T, rest: AsyncIterator[T]) -> AsyncIterator[T]:
+    yield first
+    async for item in rest:
+        yield item
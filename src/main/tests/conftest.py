@@ -0,0 +1,79 @@
+from typing import AsyncGenerator
+from typing import Dict
+from typing import List
+from unittest import mock
+
+import httpx
+import pytest
+
+from main.asgi import application
+from main.asgi import db_settings_cache
+from main.custom_types import DbSetting
+
+
+@pytest.fixture(scope="function")
+def scope() -> Dict:
+    return {
+        "asgi": {"spec_version": "2.1", "version": "3.0"},
+        "client": ("127.0.0.1", 123),
+        "headers": [
+            (b"host", b"asgi"),
+            (b"user-agent", b"python-httpx/0.21.1"),
+        ],
+        "http_version": "1.1",
+        "method": "GET",
+        "path": "/",
+        "query_string": b"",
+        "raw_path": b"/",
+        "root_path": "",
+        "scheme": "http",
+        "server": ("asgi", None),
+        "type": "http",
+    }
+
+
+@pytest.fixture(scope="function")
+def request_message() -> Dict:
+    return {
+        "body": b"",
+        "more_body": False,
+        "type": "http.request",
+    }
+
+
+@pytest.fixture(scope="function")
+def db_settings() -> List[DbSetting]:
+    return [
+        DbSetting(
+            description="Sets the maximum memory to be used for query workspaces.",  # noqa: E501
+            name="work_mem",
+            setting="4096",
+            unit="kB",
+        ),
+        DbSetting(
+            description='Sets the display format for "date" values.\nä',
+            name="DateStyle",
+            setting="ISO, MDY",
+            unit=None,
+        ),
+    ]
+
+
+@pytest.fixture(scope="function")
+async def asgi_client(
+    db_settings: List[DbSetting],
+) -> AsyncGenerator[httpx.AsyncClient, None]:
+    """
+    Client of the application with pg_settings fetch mocked out.
+    """
+
+    fetch = mock.AsyncMock(return_value=db_settings)
+
+    db_settings_cache.invalidate()
+    with mock.patch("main.asgi.fetch_db_settings", fetch):
+        async with httpx.AsyncClient(
+            app=application,
+            base_url="http://asgi",
+        ) as client:
+            yield client
+    db_settings_cache.invalidate()
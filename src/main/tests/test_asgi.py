@@ -0,0 +1,264 @@
+import asyncio
+from typing import AsyncIterator
+from typing import Dict
+from typing import List
+from unittest import mock
+
+import asyncpg
+import httpx
+import pytest
+
+from main.asgi import application
+from main.asgi import db_settings_cache
+from main.asgi import get_db_snapshot
+from main.custom_types import DbSetting
+from main.custom_types import PayloadT
+from main.db import DbUnavailableError
+from main.deadline import DeadlineExceededError
+from main.deadline import deadline_scope
+from main.deadline import get_timeout
+from main.snapshot import DbSettingsSnapshot
+
+pytestmark = [
+    pytest.mark.asyncio,
+    pytest.mark.unit,
+]
+
+
+async def cancel_pending_tasks() -> None:
+    """
+    Cancels the cache refreshes which outlive the requests
+    before the event loop of the test is closed.
+    """
+
+    tasks = asyncio.all_tasks() - {asyncio.current_task()}
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def test_get(
+    asgi_client: httpx.AsyncClient,
+    db_settings: List[DbSetting],
+) -> None:
+    resp = await asgi_client.get("/")
+    assert resp.status_code == 200
+
+    payload = PayloadT.parse_raw(resp.content)
+    assert payload.db_settings == db_settings
+    assert payload.request.body == ""
+    assert payload.request.more_body is False
+
+
+async def test_get_default_encoding(asgi_client: httpx.AsyncClient) -> None:
+    resp = await asgi_client.get("/")
+
+    payload = PayloadT.parse_raw(resp.content)
+    assert resp.content == payload.json(sort_keys=True, indent=2).encode()
+    assert b"\\u00e4" in resp.content
+    assert resp.headers["vary"] == "accept, accept-encoding"
+
+
+async def test_post_body(asgi_client: httpx.AsyncClient) -> None:
+    async def chunks() -> AsyncIterator[bytes]:
+        for chunk in (b"abc", b"def"):
+            yield chunk
+
+    resp = await asgi_client.post("/", content=chunks())
+    assert resp.status_code == 200
+
+    payload = PayloadT.parse_raw(resp.content)
+    assert payload.request.body == "abcdef"
+
+
+async def test_post_body_too_large(asgi_client: httpx.AsyncClient) -> None:
+    resp = await asgi_client.post("/", content=b"x" * (1024 * 1024 + 1))
+    assert resp.status_code == 413
+    assert resp.json() == {"detail": "request body is too large"}
+
+
+async def test_disconnect_while_fetching(
+    scope: Dict,
+    request_message: Dict,
+) -> None:
+    messages = iter([request_message, {"type": "http.disconnect"}])
+    sent: List[Dict] = []
+
+    async def receive() -> Dict:
+        return next(messages)
+
+    async def send(message: Dict) -> None:
+        sent.append(message)
+
+    async def fetch() -> List[DbSetting]:
+        await asyncio.sleep(10)
+        return []
+
+    db_settings_cache.invalidate()
+    with mock.patch("main.asgi.fetch_db_settings", fetch):
+        await asyncio.wait_for(application(scope, receive, send), 1)
+    db_settings_cache.invalidate()
+    await cancel_pending_tasks()
+
+    assert sent == []
+
+
+@pytest.mark.parametrize(
+    "error,status",
+    [
+        (DbUnavailableError(), 503),
+        (DeadlineExceededError(), 504),
+        (RuntimeError(), 500),
+    ],
+)
+async def test_failure_status(
+    asgi_client: httpx.AsyncClient,
+    error: Exception,
+    status: int,
+) -> None:
+    with mock.patch("main.asgi.fetch_db_settings", side_effect=error):
+        resp = await asgi_client.get("/")
+
+    assert resp.status_code == status
+    assert resp.headers.get("retry-after") == ("1" if status == 503 else None)
+
+
+@mock.patch("framework.config.settings.REQUEST_TIMEOUT", 0.05)
+async def test_deadline(asgi_client: httpx.AsyncClient) -> None:
+    async def fetch() -> List[DbSetting]:
+        await asyncio.sleep(10)
+        return []
+
+    with mock.patch("main.asgi.fetch_db_settings", fetch):
+        resp = await asyncio.wait_for(asgi_client.get("/"), 1)
+    await cancel_pending_tasks()
+
+    assert resp.status_code == 504
+    assert resp.json() == {"detail": "request deadline exceeded"}
+
+
+async def test_deadline_shared_refresh(db_settings: List[DbSetting]) -> None:
+    """
+    The refresh started by a request with 0.1s left
+    is not cancelled with it: a request with 30s left gets the snapshot.
+    """
+
+    async def fetch() -> List[DbSetting]:
+        await asyncio.sleep(0.2)
+        get_timeout()
+        return db_settings
+
+    async def get_snapshot(timeout: float) -> DbSettingsSnapshot:
+        with deadline_scope(timeout):
+            return await asyncio.wait_for(get_db_snapshot(), get_timeout())
+
+    db_settings_cache.invalidate()
+    with mock.patch("main.asgi.fetch_db_settings", fetch):
+        short, long = await asyncio.gather(
+            get_snapshot(0.1),
+            get_snapshot(30),
+            return_exceptions=True,
+        )
+    db_settings_cache.invalidate()
+
+    assert isinstance(short, asyncio.TimeoutError)
+    assert isinstance(long, DbSettingsSnapshot)
+    assert long.db_settings == db_settings
+
+
+@mock.patch("framework.config.settings.RESPONSE_STREAMING", True)
+async def test_streaming_db_unavailable(
+    asgi_client: httpx.AsyncClient,
+) -> None:
+    async def iter_db_settings() -> AsyncIterator[DbSetting]:
+        raise DbUnavailableError()
+        yield  # pragma: no cover
+
+    with mock.patch("main.asgi.iter_db_settings", iter_db_settings):
+        resp = await asgi_client.get("/")
+
+    assert resp.status_code == 503
+
+
+@mock.patch("framework.config.settings.RESPONSE_CHUNK_SIZE", 1)
+@mock.patch("framework.config.settings.RESPONSE_STREAMING", True)
+async def test_streaming_aborted(
+    scope: Dict,
+    request_message: Dict,
+    db_settings: List[DbSetting],
+) -> None:
+    """
+    A failure after the status has been sent aborts the response
+    instead of ending it with a list cut short.
+    """
+
+    sent: List[Dict] = []
+
+    async def receive() -> Dict:
+        return request_message
+
+    async def send(message: Dict) -> None:
+        sent.append(message)
+
+    async def iter_db_settings() -> AsyncIterator[DbSetting]:
+        yield db_settings[0]
+        raise asyncpg.QueryCanceledError()
+
+    iter_mock = mock.patch("main.asgi.iter_db_settings", iter_db_settings)
+    with iter_mock, pytest.raises(asyncpg.QueryCanceledError):
+        await application(scope, receive, send)
+
+    assert sent[0]["status"] == 200
+    assert all(msg.get("more_body") for msg in sent[1:])
+
+
+async def test_etag(asgi_client: httpx.AsyncClient) -> None:
+    resp = await asgi_client.get("/")
+    assert resp.status_code == 200
+    etag = resp.headers["etag"]
+    assert etag.startswith('W/"')
+
+    with mock.patch("main.asgi.render_body") as render_body:
+        resp = await asgi_client.get("/", headers={"if-none-match": etag})
+    assert resp.status_code == 304
+    assert resp.headers["etag"] == etag
+    assert resp.content == b""
+    render_body.assert_not_called()
+
+    resp = await asgi_client.get("/", headers={"if-none-match": 'W/"x"'})
+    assert resp.status_code == 200
+    assert resp.headers["etag"] == etag
+
+
+async def test_query(asgi_client: httpx.AsyncClient) -> None:
+    resp = await asgi_client.get("/?prefix=work&fields=name,setting")
+    assert resp.status_code == 200
+    assert resp.json()["db_settings"] == [
+        {"name": "work_mem", "setting": "4096"}
+    ]
+
+    everything = (await asgi_client.get("/")).json()["db_settings"]
+    for query_string in ("name=,", "fields=,", "name=&fields="):
+        resp = await asgi_client.get(f"/?{query_string}")
+        assert resp.status_code == 200
+        assert resp.json()["db_settings"] == everything
+
+    resp = await asgi_client.get("/?fields=nope")
+    assert resp.status_code == 400
+    assert resp.json() == {"detail": "unknown fields: nope"}
+
+
+@mock.patch("framework.config.settings.COMPRESSION_MIN_SIZE", 0)
+async def test_compression(asgi_client: httpx.AsyncClient) -> None:
+    identity = await asgi_client.get(
+        "/", headers={"accept-encoding": "identity"}
+    )
+    assert "content-encoding" not in identity.headers
+    assert identity.headers["vary"] == "accept, accept-encoding"
+
+    for _ in range(2):  # fresh and precompressed
+        resp = await asgi_client.get("/", headers={"accept-encoding": "gzip"})
+        assert resp.status_code == 200
+        assert resp.headers["content-encoding"] == "gzip"
+        assert resp.headers["vary"] == "accept, accept-encoding"
+        assert resp.json()["db_settings"] == identity.json()["db_settings"]
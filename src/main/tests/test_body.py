@@ -0,0 +1,73 @@
+from typing import Awaitable
+from typing import Callable
+from typing import Dict
+from typing import List
+
+import pytest
+
+from main.body import ClientDisconnectedError
+from main.body import RequestBodyTooLargeError
+from main.body import read_body
+
+pytestmark = [
+    pytest.mark.asyncio,
+    pytest.mark.unit,
+]
+
+
+def body_receive(*chunks: bytes) -> Callable[[], Awaitable[Dict]]:
+    messages: List[Dict] = [
+        {
+            "body": chunk,
+            "more_body": i < len(chunks) - 1,
+            "type": "http.request",
+        }
+        for i, chunk in enumerate(chunks)
+    ]
+    messages.append({"type": "http.disconnect"})
+    iterator = iter(messages)
+
+    async def receive() -> Dict:
+        return next(iterator)
+
+    return receive
+
+
+@pytest.mark.parametrize("content_length", [None, b"9"])
+@pytest.mark.parametrize("zero_copy", [False, True])
+async def test_read_body(
+    scope: Dict,
+    content_length: bytes,
+    zero_copy: bool,
+) -> None:
+    if content_length is not None:
+        scope["headers"].append((b"content-length", content_length))
+
+    request = await read_body(
+        scope,
+        body_receive(b"abc", b"", b"defghi"),
+        max_size=9,
+        zero_copy=zero_copy,
+    )
+
+    assert request["more_body"] is False
+    assert request["type"] == "http.request"
+    assert isinstance(request["body"], memoryview if zero_copy else bytes)
+    assert bytes(request["body"]) == b"abcdefghi"
+
+
+async def test_read_body_too_large(scope: Dict) -> None:
+    with pytest.raises(RequestBodyTooLargeError):
+        await read_body(scope, body_receive(b"abc", b"def"), max_size=5)
+
+    scope["headers"].append((b"content-length", b"6"))
+    with pytest.raises(RequestBodyTooLargeError):
+        await read_body(scope, body_receive(), max_size=5)
+
+
+async def test_read_body_disconnect(scope: Dict) -> None:
+    async def receive() -> Dict:
+        return {"type": "http.disconnect"}
+
+    with pytest.raises(ClientDisconnectedError):
+        await read_body(scope, receive, max_size=5)
@@ -0,0 +1,72 @@
+import asyncio
+from unittest import mock
+
+import pytest
+
+from main.cache import TtlCache
+
+pytestmark = [
+    pytest.mark.asyncio,
+    pytest.mark.unit,
+]
+
+
+async def test_single_flight() -> None:
+    loads = 0
+
+    async def loader() -> int:
+        nonlocal loads
+        loads += 1
+        await asyncio.sleep(0.01)
+        return loads
+
+    cache: TtlCache[int] = TtlCache(loader, ttl=60)
+
+    values = await asyncio.gather(*(cache.get() for _ in range(10)))
+    assert values == [1] * 10
+    assert loads == 1
+
+    assert await cache.get() == 1
+    assert cache.stats() == {
+        "generation": 1,
+        "hits": 1,
+        "misses": 10,
+        "refreshes": 1,
+    }
+
+
+async def test_ttl_expiration() -> None:
+    loader = mock.AsyncMock(side_effect=[1, 2])
+    cache: TtlCache[int] = TtlCache(loader, ttl=60)
+
+    with mock.patch("time.monotonic", return_value=1000.0):
+        assert await cache.get() == 1
+        assert await cache.get() == 1
+
+    with mock.patch("time.monotonic", return_value=1061.0):
+        assert await cache.get() == 2
+
+    assert cache.generation == 2
+    assert loader.await_count == 2
+
+
+async def test_invalidate() -> None:
+    loader = mock.AsyncMock(side_effect=[1, 2])
+    cache: TtlCache[int] = TtlCache(loader, ttl=60)
+
+    assert await cache.get() == 1
+    cache.invalidate()
+    assert not cache.is_fresh
+    assert await cache.get() == 2
+    assert cache.stats()["refreshes"] == 2
+
+
+async def test_failed_load_is_not_cached() -> None:
+    loader = mock.AsyncMock(side_effect=[OSError(), 1])
+    cache: TtlCache[int] = TtlCache(loader, ttl=60)
+
+    with pytest.raises(OSError):
+        await cache.get()
+
+    assert await cache.get() == 1
+    assert cache.generation == 1
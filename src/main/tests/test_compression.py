@@ -0,0 +1,70 @@
+import gzip
+from typing import List
+from typing import Optional
+
+import pytest
+
+from main.compression import COMPRESSORS
+from main.compression import Precompressed
+from main.compression import negotiate_encoding
+
+pytestmark = [
+    pytest.mark.unit,
+]
+
+
+def decompress(encoding: str, data: bytes) -> bytes:
+    if encoding == "gzip":
+        return gzip.decompress(data)
+
+    if encoding == "br":
+        import brotli
+
+        decompressed: bytes = brotli.decompress(data)
+        return decompressed
+
+    import zstandard
+
+    # like common decoders, stops after the first frame
+    decompressed = (
+        zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    )
+    return decompressed
+
+
+@pytest.mark.parametrize("encoding", list(COMPRESSORS))
+def test_precompressed(encoding: str) -> None:
+    prefix = b'{"db_settings": [' + b'{"name": "x"},' * 1000
+    precompressed = Precompressed(encoding, prefix)
+
+    for tail in (b"]}", b'], "request": {"body": "abc"}}'):
+        body = prefix + tail
+        compressed = precompressed.compress(body)
+        assert decompress(encoding, compressed) == body
+        assert len(compressed) < len(body) // 10
+
+
+@pytest.mark.parametrize(
+    "accept_encoding,acceptable",
+    [
+        (None, [None]),
+        (b"identity", [None]),
+        (b"gzip", ["gzip"]),
+        (b"gzip;q=0, deflate", [None]),
+        (b"*", ["gzip"]),
+        (b"br;q=0.5, gzip, zstd", ["gzip"]),
+        (b"zstd, gzip;q=0.5", ["zstd" if "zstd" in COMPRESSORS else "gzip"]),
+        (b"zstd;q=0.1, gzip", ["gzip"]),
+        (b"gzip;q=0.5, br", ["br" if "br" in COMPRESSORS else "gzip"]),
+        (b"gzip;q=0.5, identity", [None]),
+    ],
+)
+def test_negotiate_encoding(
+    accept_encoding: Optional[bytes],
+    acceptable: List[Optional[str]],
+) -> None:
+    headers = [(b"host", b"asgi")]
+    if accept_encoding is not None:
+        headers.append((b"Accept-Encoding", accept_encoding))
+
+    assert negotiate_encoding(headers) in acceptable
@@ -0,0 +1,27 @@
+import pytest
+
+from main.conditional import is_not_modified
+
+pytestmark = [
+    pytest.mark.unit,
+]
+
+
+@pytest.mark.parametrize(
+    "if_none_match,expected",
+    [
+        (None, False),
+        (b"*", True),
+        (b'W/"abc"', True),
+        (b'"abc"', True),
+        (b'"x", W/"abc"', True),
+        (b'"x", "y"', False),
+    ],
+)
+def test_is_not_modified(if_none_match: bytes, expected: bool) -> None:
+    headers = [(b"host", b"asgi")]
+    if if_none_match is not None:
+        headers.append((b"If-None-Match", if_none_match))
+
+    assert is_not_modified(headers, b'W/"abc"') is expected
+    assert is_not_modified(headers, None) is False
@@ -0,0 +1,33 @@
+import time
+
+import pytest
+
+from main.deadline import DeadlineExceededError
+from main.deadline import deadline_scope
+from main.deadline import get_remaining
+from main.deadline import get_timeout
+from main.deadline import is_expired
+
+pytestmark = [
+    pytest.mark.unit,
+]
+
+
+def test_deadline() -> None:
+    assert get_remaining() is None
+    assert get_timeout() is None
+    assert get_timeout(5) == 5
+
+    with deadline_scope(1):
+        assert 0 < get_timeout() <= 1  # type: ignore
+        assert get_timeout(0.5) == 0.5
+        assert 0 < get_timeout(5) <= 1  # type: ignore
+
+    with deadline_scope(0.01):
+        time.sleep(0.02)
+        assert is_expired()
+        with pytest.raises(DeadlineExceededError):
+            get_timeout(5)
+
+    assert get_remaining() is None
+    assert not is_expired()
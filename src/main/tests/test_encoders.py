@@ -0,0 +1,45 @@
+from unittest import mock
+
+import pytest
+
+from main.encoders import negotiate_encoder
+
+pytestmark = [
+    pytest.mark.unit,
+]
+
+
+@pytest.mark.parametrize(
+    "accept,compact",
+    [
+        (None, False),
+        (b"application/json", False),
+        (b"application/json; indent=0", True),
+        (b"text/html, */*;q=0.8;indent=0", True),
+        (b"text/html; indent=0", False),
+        (b"application/json; indent=2", False),
+    ],
+)
+def test_negotiate_encoder(accept: bytes, compact: bool) -> None:
+    headers = [(b"host", b"asgi")]
+    if accept is not None:
+        headers.append((b"accept", accept))
+
+    assert negotiate_encoder(headers).compact is compact
+
+
+@mock.patch("framework.config.settings.JSON_COMPACT", True)
+def test_negotiate_encoder_default_compact() -> None:
+    assert negotiate_encoder([]).compact is True
+    assert negotiate_encoder([(b"accept", b"*/*; indent=2")]).compact is False
+
+
+@pytest.mark.parametrize("backend", ["orjson", "stdlib"])
+def test_encoder_backend(backend: str) -> None:
+    with mock.patch("framework.config.settings.JSON_ENCODER", backend):
+        encoder = negotiate_encoder([])
+
+    assert encoder.name == backend
+    assert encoder.dumps({"b": 1, "a": [None]}) == (
+        b'{\n  "a": [\n    null\n  ],\n  "b": 1\n}'
+    )
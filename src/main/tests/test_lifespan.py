@@ -0,0 +1,137 @@
+import asyncio
+from typing import Awaitable
+from typing import Callable
+from typing import Dict
+from typing import List
+from unittest import mock
+
+import httpx
+import pytest
+
+from main import db
+from main.asgi import application
+from main.asgi import db_settings_cache
+
+pytestmark = [
+    pytest.mark.asyncio,
+    pytest.mark.unit,
+]
+
+
+def lifespan_receive(*types: str) -> Callable[[], Awaitable[Dict]]:
+    messages = iter([{"type": type_} for type_ in types])
+
+    async def receive() -> Dict:
+        return next(messages)
+
+    return receive
+
+
+async def test_lifespan_opens_and_closes_pool() -> None:
+    sent: List[Dict] = []
+
+    async def send(message: Dict) -> None:
+        sent.append(message)
+
+    pool = mock.AsyncMock()
+    listener = mock.AsyncMock()
+    listener.add_termination_listener = mock.Mock()
+
+    with mock.patch(
+        "asyncpg.create_pool", mock.AsyncMock(return_value=pool)
+    ), mock.patch("asyncpg.connect", mock.AsyncMock(return_value=listener)):
+        await application(
+            {"type": "lifespan"},
+            lifespan_receive("lifespan.startup", "lifespan.shutdown"),
+            send,
+        )
+
+    assert sent == [
+        {"type": "lifespan.startup.complete"},
+        {"type": "lifespan.shutdown.complete"},
+    ]
+    pool.close.assert_awaited_once()
+    assert db.get_db_pool() is None
+    listener.add_listener.assert_awaited_once()
+    listener.close.assert_awaited_once()
+
+
+async def test_lifespan_startup_db_unavailable() -> None:
+    """
+    The worker boots without the DB: requests get 503 meanwhile,
+    and the pool is opened by the first request after the DB is back.
+    """
+
+    sent: List[Dict] = []
+    messages: "asyncio.Queue[Dict]" = asyncio.Queue()
+
+    async def send(message: Dict) -> None:
+        sent.append(message)
+
+    create_pool = mock.AsyncMock(side_effect=OSError("connection refused"))
+
+    db_settings_cache.invalidate()
+    with mock.patch("asyncpg.create_pool", create_pool):
+        messages.put_nowait({"type": "lifespan.startup"})
+        lifespan = asyncio.ensure_future(
+            application({"type": "lifespan"}, messages.get, send)
+        )
+        await asyncio.sleep(0)
+
+        assert sent == [{"type": "lifespan.startup.complete"}]
+        assert db.get_db_pool() is None
+
+        async with httpx.AsyncClient(
+            app=application,
+            base_url="http://asgi",
+        ) as client:
+            resp = await client.get("/")
+            assert resp.status_code == 503
+
+            create_pool.side_effect = None
+            create_pool.return_value = pool = mock.AsyncMock()
+            pool.acquire.side_effect = OSError("connection refused")
+            resp = await client.get("/")
+            assert resp.status_code == 503
+            assert db.get_db_pool() is pool
+
+        messages.put_nowait({"type": "lifespan.shutdown"})
+        await lifespan
+    db_settings_cache.invalidate()
+
+    assert create_pool.await_count == 3
+    assert sent[-1] == {"type": "lifespan.shutdown.complete"}
+    assert db.get_db_pool() is None
+
+
+@mock.patch("main.db.DB_LISTENER_RETRY_MIN", 0.0)
+async def test_db_listener_reconnects() -> None:
+    """
+    A lost LISTEN connection is reopened, and the callback is called
+    once since NOTIFYs may have been missed meanwhile.
+    """
+
+    callback = mock.Mock()
+    listeners = [mock.AsyncMock(), mock.AsyncMock()]
+    for listener in listeners:
+        listener.add_termination_listener = mock.Mock()
+
+    connect = mock.AsyncMock(
+        side_effect=[listeners[0], OSError()] + listeners[1:]
+    )
+
+    with mock.patch("asyncpg.connect", connect):
+        assert await db.open_db_listener("x", callback) is listeners[0]
+
+        on_terminated = listeners[0].add_termination_listener.call_args.args[0]
+        on_terminated(listeners[0])
+        for _ in range(10):
+            await asyncio.sleep(0)
+
+        assert connect.await_count == 3
+        listeners[1].add_listener.assert_awaited_once_with("x", callback)
+        callback.assert_called_once_with(listeners[1], None, "x", None)
+
+        await db.close_db_listener()
+
+    listeners[1].close.assert_awaited_once()
@@ -0,0 +1,98 @@
+import json
+import os
+from pathlib import Path
+from typing import Iterator
+from unittest import mock
+
+import httpx
+import pytest
+
+from main import metrics
+from main.metrics import Counter
+from main.metrics import Histogram
+
+pytestmark = [
+    pytest.mark.unit,
+]
+
+
+@pytest.fixture(scope="function")
+def histogram() -> Iterator[Histogram]:
+    hist = Histogram(
+        "test_seconds",
+        "Test histogram",
+        label="phase",
+        buckets=(0.1, 1.0),
+    )
+    yield hist
+    del metrics.REGISTRY[hist.name]
+
+
+def test_render_histogram(histogram: Histogram) -> None:
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(value, "x")
+
+    exposition = metrics.render(metrics.collect()).decode()
+
+    assert "# TYPE test_seconds histogram" in exposition
+    assert 'test_seconds_bucket{phase="x",le="0.1"} 2' in exposition
+    assert 'test_seconds_bucket{phase="x",le="1.0"} 3' in exposition
+    assert 'test_seconds_bucket{phase="x",le="+Inf"} 4' in exposition
+    assert 'test_seconds_count{phase="x"} 4' in exposition
+
+
+@pytest.mark.asyncio
+async def test_aggregate_across_processes(
+    histogram: Histogram,
+    tmp_path: Path,
+) -> None:
+    histogram.observe(0.5, "x")
+    counter = Counter("test_total", "Test counter", lambda: 3)
+
+    dead_pid = 2**22 + 1
+    (tmp_path / f"{dead_pid}.json").write_text(
+        json.dumps(
+            {
+                "counters": {"test_total": 7},
+                "gauges": {"exlibris_db_pool_size": 100},
+                "histograms": {
+                    "test_seconds": {
+                        "x": {"buckets": [1, 0, 0], "count": 1, "sum": 0.01},
+                    },
+                },
+            }
+        )
+    )
+
+    try:
+        metrics_dir = mock.patch(
+            "framework.config.settings.METRICS_DIR", str(tmp_path)
+        )
+        with metrics_dir:
+            state = await metrics.aggregate()
+            # the dead process file is merged once, not on every scrape
+            assert not (tmp_path / f"{dead_pid}.json").exists()
+            assert (tmp_path / metrics.ARCHIVE_NAME).is_file()
+            assert await metrics.aggregate() == state
+    finally:
+        del metrics.REGISTRY[counter.name]
+
+    assert (tmp_path / f"{os.getpid()}.json").is_file()
+    assert state["histograms"]["test_seconds"]["x"]["buckets"] == [1, 1, 0]
+    assert state["histograms"]["test_seconds"]["x"]["count"] == 2
+    assert "exlibris_db_pool_size" not in state["gauges"]
+    # the final value of the dead process is kept
+    assert state["counters"]["test_total"] == 10
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint(asgi_client: httpx.AsyncClient) -> None:
+    await asgi_client.get("/")
+    resp = await asgi_client.get("/metrics")
+
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain")
+    assert 'exlibris_phase_seconds_count{phase="request"}' in resp.text
+    assert "# TYPE exlibris_db_settings_cache_misses_total counter" in (
+        resp.text
+    )
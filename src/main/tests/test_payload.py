@@ -0,0 +1,44 @@
+from typing import Dict
+from typing import List
+
+import pytest
+
+from main.asgi import build_payload
+from main.custom_types import DbSetting
+from main.custom_types import PayloadT
+
+pytestmark = [
+    pytest.mark.unit,
+]
+
+
+def test_trusted_payload_is_the_same(
+    scope: Dict,
+    request_message: Dict,
+    db_settings: List[DbSetting],
+) -> None:
+    validated = build_payload(
+        scope, request_message, db_settings, trusted=False
+    )
+    trusted = build_payload(scope, request_message, db_settings, trusted=True)
+
+    assert trusted == validated
+    assert trusted.json(sort_keys=True, indent=2) == validated.json(
+        sort_keys=True, indent=2
+    )
+    assert PayloadT.parse_raw(trusted.json()) == validated
+
+
+def test_trusted_payload_missing_spec_version(
+    scope: Dict,
+    request_message: Dict,
+) -> None:
+    scope["asgi"] = {"version": "3.0"}
+
+    payload = build_payload(scope, request_message, [], trusted=True)
+
+    assert payload.scope.asgi.spec_version is None
+    assert payload.scope.asgi.dict() == {
+        "spec_version": None,
+        "version": "3.0",
+    }
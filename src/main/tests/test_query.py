@@ -0,0 +1,87 @@
+from typing import List
+
+import pytest
+
+from main.custom_types import DbSetting
+from main.query import InvalidQueryError
+from main.query import SettingsQuery
+from main.query import parse_settings_query
+from main.snapshot import DbSettingsSnapshot
+
+pytestmark = [
+    pytest.mark.unit,
+]
+
+
+def test_parse_settings_query() -> None:
+    assert parse_settings_query(b"") is None
+    assert parse_settings_query(b"x=1") is None
+
+    query = parse_settings_query(
+        b"name=Work_Mem,DateStyle&name=work_mem&prefix=W&fields=setting,name"
+    )
+    assert query == SettingsQuery(
+        fields=("name", "setting"),
+        names=("work_mem", "datestyle"),
+        prefix="w",
+    )
+
+    with pytest.raises(InvalidQueryError):
+        parse_settings_query(b"fields=name,nope")
+
+
+@pytest.mark.parametrize(
+    "query_string",
+    [b"name=", b"name=,", b"name=%20", b"name=&name="],
+)
+def test_empty_names(query_string: bytes) -> None:
+    assert parse_settings_query(query_string) is None
+
+    query = parse_settings_query(query_string + b"&prefix=w")
+    assert query == SettingsQuery(prefix="w")
+
+
+@pytest.mark.parametrize(
+    "query_string",
+    [b"fields=", b"fields=,", b"fields=%20", b"fields=&fields="],
+)
+def test_empty_fields(query_string: bytes) -> None:
+    assert parse_settings_query(query_string) is None
+
+    query = parse_settings_query(query_string + b"&name=work_mem")
+    assert query == SettingsQuery(names=("work_mem",))
+
+
+def test_empty_prefix() -> None:
+    assert parse_settings_query(b"prefix=%20") is None
+
+
+@pytest.mark.parametrize(
+    "query_string,names",
+    [
+        (b"name=work_mem,DATESTYLE,nope", ["DateStyle", "work_mem"]),
+        (b"prefix=date", ["DateStyle"]),
+        (b"prefix=w", ["work_mem"]),
+        (b"prefix=x", []),
+        (b"name=work_mem,datestyle&prefix=d", ["DateStyle"]),
+    ],
+)
+def test_select(
+    db_settings: List[DbSetting],
+    query_string: bytes,
+    names: List[str],
+) -> None:
+    snapshot = DbSettingsSnapshot(db_settings)
+    query = parse_settings_query(query_string)
+    assert query is not None
+
+    selected = snapshot.select(query)
+    assert [db_setting["name"] for db_setting in selected] == names
+
+
+def test_project(db_settings: List[DbSetting]) -> None:
+    snapshot = DbSettingsSnapshot(db_settings)
+    query = parse_settings_query(b"prefix=work&fields=setting,name")
+    assert query is not None
+
+    assert snapshot.select(query) == [{"name": "work_mem", "setting": "4096"}]
@@ -0,0 +1,102 @@
+import os
+import subprocess
+import sys
+from typing import Callable
+from typing import Dict
+from unittest import mock
+
+import httpx
+import pytest
+import sentry_sdk
+
+from framework.dirs import DIR_SRC
+from main.sentry import init_sentry
+from main.sentry import instrument_application
+from main.sentry import traces_sampler
+
+pytestmark = [
+    pytest.mark.unit,
+]
+
+
+@pytest.mark.parametrize(
+    "sampling_context,rate",
+    [
+        ({"asgi_scope": {"path": "/"}}, 0.01),
+        ({"asgi_scope": {"path": "/e"}}, 1.0),
+        ({"asgi_scope": {"path": "/error"}}, 1.0),
+        ({"asgi_scope": {"path": "/metrics"}}, 0.0),
+        ({"asgi_scope": {"path": "/"}, "parent_sampled": True}, 1.0),
+        ({}, 0.01),
+    ],
+)
+def test_traces_sampler(sampling_context: Dict, rate: float) -> None:
+    assert traces_sampler(sampling_context) == rate
+
+
+@mock.patch("sentry_sdk.init")
+def test_init_sentry(sentry_init: mock.Mock) -> None:
+    with mock.patch("framework.config.settings.SENTRY_DSN", None):
+        assert init_sentry() is False
+    sentry_init.assert_not_called()
+
+    with mock.patch("framework.config.settings.SENTRY_DSN", "https://x@y/1"):
+        assert init_sentry() is True
+    sentry_init.assert_called_once_with(
+        "https://x@y/1",
+        traces_sampler=traces_sampler,
+    )
+
+
+@pytest.mark.asyncio
+async def test_instrument_application() -> None:
+    async def application(
+        scope: Dict,
+        receive: Callable,
+        send: Callable,
+    ) -> None:
+        await send(
+            {"headers": [], "status": 204, "type": "http.response.start"}
+        )
+        await send({"body": b"", "type": "http.response.body"})
+
+    with mock.patch("framework.config.settings.SENTRY_DSN", None):
+        assert instrument_application(application) is application
+
+    sampler = mock.Mock(return_value=0.0)
+
+    with mock.patch(
+        "framework.config.settings.SENTRY_DSN", "https://x@localhost/1"
+    ), mock.patch("main.sentry.traces_sampler", sampler):
+        instrumented = instrument_application(application)
+        try:
+            async with httpx.AsyncClient(
+                app=instrumented,
+                base_url="http://asgi",
+            ) as client:
+                resp = await client.get("/e/x")
+        finally:
+            sentry_sdk.Hub.current.bind_client(None)
+
+    assert resp.status_code == 204
+    sampler.assert_called_once()
+    sampling_context = sampler.call_args.args[0]
+    assert sampling_context["asgi_scope"]["path"] == "/e/x"
+
+
+def test_middleware_not_imported_without_dsn() -> None:
+    code = (
+        "import sys;"
+        "from main.asgi import application, dispatch;"
+        "assert application is dispatch;"
+        "assert 'sentry_sdk.integrations.asgi' not in sys.modules"
+    )
+    env = {**os.environ, "PYTHONPATH": DIR_SRC.as_posix()}
+    env.pop("SENTRY_DSN", None)
+    env.setdefault("DATABASE_URL", "postgresql://user@localhost:5432/db")
+
+    subprocess.run(  # noqa: S603
+        [sys.executable, "-c", code],
+        check=True,
+        env=env,
+    )
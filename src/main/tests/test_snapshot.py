@@ -0,0 +1,78 @@
+import json
+from typing import Dict
+from typing import List
+
+import pytest
+
+from main.asgi import build_payload
+from main.custom_types import DbSetting
+from main.encoders import ENCODERS
+from main.encoders import Encoder
+from main.encoders import StdlibEncoder
+from main.snapshot import DbSettingsSnapshot
+from main.snapshot import dump_payload
+
+pytestmark = [
+    pytest.mark.unit,
+]
+
+
+@pytest.mark.parametrize("nr_settings", [0, 1, 2])
+def test_dump_payload_is_byte_identical(
+    scope: Dict,
+    request_message: Dict,
+    db_settings: List[DbSetting],
+    nr_settings: int,
+) -> None:
+    db_settings = db_settings[:nr_settings]
+
+    expected = (
+        build_payload(scope, request_message, db_settings)
+        .json(sort_keys=True, indent=2)
+        .encode()
+    )
+
+    snapshot = DbSettingsSnapshot(db_settings)
+    payload = build_payload(scope, request_message, [])
+    encoder = StdlibEncoder()
+
+    assert dump_payload(payload, snapshot, encoder) == expected
+
+    per_request = payload.json(sort_keys=True, indent=2).encode()
+    assert encoder.dumps(payload.dict()) == per_request
+
+
+@pytest.mark.parametrize(
+    "encoder", ENCODERS.values(), ids=lambda encoder: encoder.key
+)
+def test_dump_payload_encoders(
+    scope: Dict,
+    request_message: Dict,
+    db_settings: List[DbSetting],
+    encoder: Encoder,
+) -> None:
+    full_payload = build_payload(scope, request_message, db_settings)
+    expected = encoder.dumps(full_payload.dict())
+
+    snapshot = DbSettingsSnapshot(db_settings)
+    payload = build_payload(scope, request_message, [])
+    body = dump_payload(payload, snapshot, encoder)
+
+    assert body == expected
+    assert json.loads(body) == json.loads(full_payload.json())
+    assert (b"\n" in body) is not encoder.compact
+
+
+def test_json_block_is_computed_once(db_settings: List[DbSetting]) -> None:
+    snapshot = DbSettingsSnapshot(db_settings)
+    encoder = StdlibEncoder()
+
+    assert snapshot.json_block(encoder) is snapshot.json_block(encoder)
+
+
+def test_etag(db_settings: List[DbSetting]) -> None:
+    snapshot = DbSettingsSnapshot(db_settings)
+
+    assert snapshot.etag is snapshot.etag
+    assert snapshot.etag == DbSettingsSnapshot(list(db_settings)).etag
+    assert snapshot.etag != DbSettingsSnapshot(db_settings[:1]).etag
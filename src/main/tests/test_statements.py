@@ -0,0 +1,49 @@
+from typing import Any
+from typing import Dict
+from typing import List
+
+import pytest
+
+from main import metrics
+from main.db import StatementRegistry
+
+pytestmark = [
+    pytest.mark.asyncio,
+    pytest.mark.unit,
+]
+
+
+class FakeConnection:
+    def __init__(self) -> None:
+        self.prepared_statements: Dict[str, Any] = {}
+        self.queries: List[str] = []
+
+    async def prepare(self, query: str) -> str:
+        self.queries.append(query)
+        return f"stmt {query}"
+
+
+async def test_prepared_once_per_connection() -> None:
+    statements = StatementRegistry()
+    name = statements.register("test", "SELECT 1")
+
+    try:
+        pooled = FakeConnection()
+        await statements.prepare_all(pooled)
+        for _ in range(3):
+            assert await statements.get(pooled, name) == "stmt SELECT 1"
+        assert pooled.queries == ["SELECT 1"]
+
+        # a recycled connection, not initialized by the pool
+        fresh = FakeConnection()
+        await statements.get(fresh, name)
+        await statements.get(fresh, name)
+        assert fresh.queries == ["SELECT 1"]
+
+        assert statements.stats() == {"test": {"executes": 5, "prepares": 2}}
+        counters = metrics.collect()["counters"]
+        assert counters["exlibris_db_statement_test_prepares_total"] == 2
+        assert counters["exlibris_db_statement_test_executes_total"] == 5
+    finally:
+        metrics.REGISTRY.pop("exlibris_db_statement_test_prepares_total")
+        metrics.REGISTRY.pop("exlibris_db_statement_test_executes_total")
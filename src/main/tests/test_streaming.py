@@ -0,0 +1,91 @@
+from typing import AsyncIterator
+from typing import Dict
+from typing import List
+
+import pytest
+
+from main.asgi import build_payload
+from main.custom_types import DbSetting
+from main.encoders import ENCODERS
+from main.encoders import Encoder
+from main.query import parse_settings_query
+from main.snapshot import DbSettingsSnapshot
+from main.snapshot import dump_payload
+from main.streaming import send_chunked
+from main.streaming import stream_payload
+
+pytestmark = [
+    pytest.mark.asyncio,
+    pytest.mark.unit,
+]
+
+
+async def aiter_list(items: List[DbSetting]) -> AsyncIterator[DbSetting]:
+    for item in items:
+        yield item
+
+
+@pytest.mark.parametrize("nr_settings", [0, 1, 2])
+@pytest.mark.parametrize(
+    "encoder", ENCODERS.values(), ids=lambda encoder: encoder.key
+)
+async def test_stream_payload(
+    scope: Dict,
+    request_message: Dict,
+    db_settings: List[DbSetting],
+    encoder: Encoder,
+    nr_settings: int,
+) -> None:
+    db_settings = db_settings[:nr_settings]
+    payload = build_payload(scope, request_message, [])
+
+    expected = dump_payload(payload, DbSettingsSnapshot(db_settings), encoder)
+
+    pieces = stream_payload(payload, aiter_list(db_settings), encoder)
+    body = b"".join([piece async for piece in pieces])
+
+    assert body == expected
+
+
+@pytest.mark.parametrize(
+    "query_string",
+    [b"prefix=date", b"name=work_mem&fields=setting", b"prefix=x"],
+)
+@pytest.mark.parametrize(
+    "encoder", ENCODERS.values(), ids=lambda encoder: encoder.key
+)
+async def test_stream_payload_query(
+    scope: Dict,
+    request_message: Dict,
+    db_settings: List[DbSetting],
+    encoder: Encoder,
+    query_string: bytes,
+) -> None:
+    query = parse_settings_query(query_string)
+    payload = build_payload(scope, request_message, [])
+    snapshot = DbSettingsSnapshot(db_settings)
+
+    expected = dump_payload(payload, snapshot, encoder, query)
+
+    pieces = stream_payload(payload, aiter_list(db_settings), encoder, query)
+    body = b"".join([piece async for piece in pieces])
+
+    assert body == expected
+
+
+async def test_send_chunked() -> None:
+    sent: List[Dict] = []
+
+    async def send(message: Dict) -> None:
+        sent.append(message)
+
+    async def pieces() -> AsyncIterator[bytes]:
+        for piece in (b"ab", b"cd", b"e"):
+            yield piece
+
+    await send_chunked(send, pieces(), 3)
+
+    assert [(msg["body"], msg["more_body"]) for msg in sent] == [
+        (b"abcd", True),
+        (b"e", False),
+    ]
@@ -0,0 +1,24 @@
+from unittest import mock
+
+import pytest
+
+from main.workers import is_over_memory_limit
+
+pytestmark = [
+    pytest.mark.unit,
+]
+
+
+def test_is_over_memory_limit() -> None:
+    with mock.patch("main.workers.settings.WORKER_MAX_RSS", None):
+        assert is_over_memory_limit() is False
+
+    with mock.patch("main.workers.settings.WORKER_MAX_RSS", 1):
+        assert is_over_memory_limit() is True
+
+    with mock.patch("main.workers.settings.WORKER_MAX_RSS", 1 << 50):
+        assert is_over_memory_limit() is False
+
+    rss_unknown = mock.patch("main.workers.get_rss", return_value=None)
+    with mock.patch("main.workers.settings.WORKER_MAX_RSS", 1), rss_unknown:
+        assert is_over_memory_limit() is False
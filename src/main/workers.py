@@ -0,0 +1,90 @@
+import os
+import signal
+from typing import Dict
+
+from uvicorn.workers import UvicornWorker
+
+from framework.config import settings
+from framework.resources import get_rss
+
+SERVER_PROFILES: Dict[str, Dict] = {
+    # pure-Python HTTP parser on the stock asyncio loop
+    "compat": {
+        "http": "h11",
+        "loop": "asyncio",
+    },
+    # C-accelerated HTTP parser and event loop
+    "fast": {
+        "http": "httptools",
+        "loop": "uvloop",
+    },
+}
+
+
+def get_server_config() -> Dict:
+    """
+    Uvicorn config of the SERVER_PROFILE.
+    """
+
+    config = {
+        **SERVER_PROFILES[settings.SERVER_PROFILE],
+        "backlog": settings.SERVER_BACKLOG,
+        "limit_concurrency": settings.SERVER_LIMIT_CONCURRENCY,
+        "timeout_keep_alive": settings.SERVER_KEEPALIVE,
+    }
+
+    return config
+
+
+class RecyclingWorker(UvicornWorker):
+    """
+    Recycles itself once its RSS exceeds WORKER_MAX_RSS.
+    The check runs on each heartbeat to the gunicorn arbiter.
+    SIGTERM makes uvicorn finish in-flight requests and exit,
+    and the arbiter spawns a fresh worker in its place.
+    """
+
+    recycling = False
+
+    async def callback_notify(self) -> None:
+        await super().callback_notify()
+
+        if not self.recycling and is_over_memory_limit():
+            self.recycling = True
+            self.log.info(
+                "worker %s: RSS over %s bytes, recycling",
+                self.pid,
+                settings.WORKER_MAX_RSS,
+            )
+            os.kill(self.pid, signal.SIGTERM)
+
+
+def is_over_memory_limit() -> bool:
+    if not settings.WORKER_MAX_RSS:
+        return False
+
+    rss = get_rss()
+    if rss is None:
+        return False
+
+    return rss > settings.WORKER_MAX_RSS
+
+
+class CompatWorker(RecyclingWorker):
+    CONFIG_KWARGS = {
+        **SERVER_PROFILES["compat"],
+        "limit_concurrency": settings.SERVER_LIMIT_CONCURRENCY,
+    }
+
+
+class FastWorker(RecyclingWorker):
+    CONFIG_KWARGS = {
+        **SERVER_PROFILES["fast"],
+        "limit_concurrency": settings.SERVER_LIMIT_CONCURRENCY,
+    }
+
+
+WORKERS = {
+    "compat": f"{__name__}.{CompatWorker.__name__}",
+    "fast": f"{__name__}.{FastWorker.__name__}",
+}
@@ -1,31 +1,36 @@
 import argparse
+import shlex
 import sys
+from typing import Any
+from typing import List
+from typing import TextIO
+from typing import Type
 
+from management.commands import COMMAND_MODULES
 from management.commands import COMMANDS
+from management.commands import load_commands
+from management.commands.abstract import ManagementCommand
 
 
 def main() -> None:
-    parser = argparse.ArgumentParser()
-    subparsers = parser.add_subparsers(
-        dest="command",
-        required=True,
-        title="commands",
-    )
+    if sys.argv[1:2] == ["--batch"]:
+        path = sys.argv[2] if len(sys.argv) > 2 else "-"
+        if path == "-":
+            batch(sys.stdin)
+        else:
+            with open(path, encoding="utf-8") as src:
+                batch(src)
+        return
 
-    for command_name, command in COMMANDS.items():
-        command_parser = subparsers.add_parser(command_name, help=command.help)
-        if command.arguments:
-            group = command_parser.add_mutually_exclusive_group(
-                required=command.required
-            )
-            for key, help_ in command.arguments.items():
-                dest = command.dest(key)
-                group.add_argument(
-                    key,
-                    action="store_true",
-                    dest=dest,
-                    help=help_,
-                )
+    # only the command being run is imported;
+    # all of them are needed for the help or an unknown command
+    command_name = sys.argv[1] if len(sys.argv) > 1 else ""
+    if command_name in COMMAND_MODULES:
+        load_commands([command_name])
+    else:
+        load_commands(COMMAND_MODULES)
+
+    parser = build_parser()
 
     try:
         args = parser.parse_args()
@@ -41,5 +46,91 @@ def main() -> None:
     cmd()
 
 
+def batch(src: TextIO) -> None:
+    """
+    Runs commands, one per line, in this process:
+        python -m management --batch [FILE | -]
+    Lines are split like in the shell; blank lines and # comments
+    are skipped. Stops at the first failed command.
+    """
+
+    argvs: List[List[str]] = [
+        argv
+        for argv in (shlex.split(line, comments=True) for line in src)
+        if argv
+    ]
+
+    names = {argv[0] for argv in argvs}
+    if names <= COMMAND_MODULES.keys():
+        load_commands(names)
+    else:
+        load_commands(COMMAND_MODULES)
+
+    parser = build_parser()
+
+    # all lines are parsed before any command runs
+    parsed = [parser.parse_args(argv) for argv in argvs]
+
+    for argv, args in zip(argvs, parsed):
+        cmd_cls = COMMANDS[args.command]
+        try:
+            cmd = cmd_cls(args)
+            cmd()
+        except Exception:
+            print(  # noqa: T001
+                f"batch: failed: {shlex.join(argv)}",
+                file=sys.stderr,
+            )
+            raise
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        epilog=(
+            "--batch [FILE]: runs commands from FILE or stdin,"
+            " one per line, in a single process"
+        ),
+    )
+    subparsers = parser.add_subparsers(
+        dest="command",
+        required=True,
+        title="commands",
+    )
+
+    for command_name, command in COMMANDS.items():
+        command_parser = subparsers.add_parser(command_name, help=command.help)
+        add_arguments(command_parser, command)
+
+    return parser
+
+
+def add_arguments(
+    command_parser: argparse.ArgumentParser,
+    command: Type[ManagementCommand],
+) -> None:
+    group: Any = command_parser
+    if command.arguments and command.exclusive:
+        group = command_parser.add_mutually_exclusive_group(
+            required=command.required
+        )
+
+    for key, help_ in command.arguments.items():
+        group.add_argument(
+            key,
+            action="store_true",
+            dest=command.dest(key),
+            help=help_,
+        )
+
+    for key, help_ in command.options.items():
+        command_parser.add_argument(
+            key,
+            choices=command.choices.get(key),
+            dest=command.dest(key),
+            help=help_,
+            metavar=key.lstrip("-").upper(),
+        )
+
+
 if __name__ == "__main__":
     main()
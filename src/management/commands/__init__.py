@@ -1,9 +1,45 @@
+from importlib import import_module
+from typing import Iterable
+from typing import Type
+
 from .abstract import COMMANDS
-from .db_config import DbConfigCommand
-from .heroku import HerokuCommand
+from .abstract import ManagementCommand
+
+# command name -> (module, class): a command is imported only when it runs
+COMMAND_MODULES = {
+    "bench": (".bench", "BenchCommand"),
+    "db-config": (".db_config", "DbConfigCommand"),
+    "heroku": (".heroku", "HerokuCommand"),
+}
+
+
+def load_commands(names: Iterable[str]) -> None:
+    """
+    Imports the modules of the commands,
+    which registers the commands in COMMANDS.
+    """
+
+    for name in names:
+        module, _cls = COMMAND_MODULES[name]
+        import_module(module, __name__)
+
+
+def __getattr__(name: str) -> Type[ManagementCommand]:
+    for module, cls in COMMAND_MODULES.values():
+        if cls == name:
+            command: Type[ManagementCommand] = getattr(
+                import_module(module, __name__), cls
+            )
+            return command
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = (
+    "BenchCommand",
     "COMMANDS",
+    "COMMAND_MODULES",
     "DbConfigCommand",
     "HerokuCommand",
+    "load_commands",
 )
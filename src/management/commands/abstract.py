@@ -27,8 +27,11 @@ class _ManagementCommandMeta(abc.ABCMeta):
 
 class ManagementCommand(metaclass=_ManagementCommandMeta):
     arguments: Dict[str, str] = {}
+    choices: Dict[str, Tuple[str, ...]] = {}
+    exclusive: bool = True
     help: Optional[str] = None  # noqa: A003,VNE003
     name: Optional[str] = None
+    options: Dict[str, str] = {}
     required: bool = False
 
     def __init__(self, args: Namespace) -> None:
@@ -40,6 +43,12 @@ class ManagementCommand(metaclass=_ManagementCommandMeta):
         value = bool(vars(self.__args).get(dest))
         return value
 
+    def option_value(self, option: str) -> Optional[str]:
+        dest = self.dest(option)
+
+        value: Optional[str] = vars(self.__args).get(dest)
+        return value
+
     @classmethod
     def dest(cls, argument: str) -> str:
         assert cls.name, "name attr MUST be set"
@@ -0,0 +1,73 @@
+import asyncio
+import sys
+from pathlib import Path
+
+from framework.config import settings
+from management.commands.abstract import ManagementCommand
+
+
+class BenchCommand(ManagementCommand):
+    name = "bench"
+    help = (  # noqa: A003,VNE003
+        "Load benchmark of the application."
+        " Reports RPS, p50/p95/p99 latency (ms) and allocations."
+        " If called without arguments, runs the app in-process."
+    )
+    arguments = {
+        "--in-process": "Runs the application in-process",
+        "--server": "Benchmarks the running server at TEST_SERVICE_URL",
+    }
+    options = {
+        "--baseline": (
+            "Results JSON of a previous run to compare with."
+            " Exits with 1 if any metric regressed beyond the threshold"
+        ),
+        "--concurrency": "Number of concurrent clients, default: 10",
+        "--output": "File to save results JSON into",
+        "--path": "Request path, default: /",
+        "--requests": "Total number of requests, default: 1000",
+        "--threshold": "Regression threshold, default: 0.1",
+    }
+
+    def __call__(self) -> None:
+        from benchmarks import load
+
+        concurrency = int(self.option_value("--concurrency") or 10)
+        path = self.option_value("--path") or "/"
+        requests = int(self.option_value("--requests") or 1000)
+
+        if self.option_is_active("--server"):
+            coro = load.bench_server(
+                settings.TEST_SERVICE_URL,
+                concurrency=concurrency,
+                path=path,
+                requests=requests,
+            )
+        else:
+            coro = load.bench_in_process(
+                concurrency=concurrency,
+                path=path,
+                requests=requests,
+            )
+
+        result = asyncio.run(coro)
+
+        output = self.option_value("--output")
+        if output:
+            load.save_result(result, Path(output))
+
+        baseline_file = self.option_value("--baseline")
+        baseline = (
+            load.load_result(Path(baseline_file)) if baseline_file else None
+        )
+
+        print(load.format_result(result, baseline))  # noqa: T001
+
+        if baseline is not None:
+            threshold = float(self.option_value("--threshold") or 0.1)
+            regressions = load.compare_results(
+                baseline, result, threshold=threshold
+            )
+            if regressions:
+                print(f"regressions: {regressions}")  # noqa: T001
+                sys.exit(1)
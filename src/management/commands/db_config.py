@@ -1,12 +1,28 @@
+import json
+import shlex
+from typing import Any
+from typing import Dict
+
 from framework.config import settings
 from management.commands.abstract import ManagementCommand
 
+# argument -> key in the batch output
+FIELDS = {
+    "--db-name": "DB_NAME",
+    "--host": "DB_HOST",
+    "--password": "DB_PASSWORD",
+    "--port": "DB_PORT",
+    "--username": "DB_USER",
+}
+
 
 class DbConfigCommand(ManagementCommand):
     name = "db-config"
     help = (  # noqa: A003,VNE003
         "DB config command."
-        " If called without arguments, displays the full DB config"
+        " If called without arguments, displays the full DB config."
+        " A single field is printed as is;"
+        " several fields are printed in the --format, env by default"
     )
     arguments = {
         "--db-name": "Prints the DB name",
@@ -15,6 +31,17 @@ class DbConfigCommand(ManagementCommand):
         "--port": "Prints the DB port",
         "--username": "Prints the DB username",
     }
+    choices = {
+        "--format": ("env", "json"),
+    }
+    exclusive = False
+    options = {
+        "--format": (
+            "Output format of the requested fields:"
+            " env (shell-evaluable KEY=value lines) or json."
+            " Without fields, all of them are printed"
+        ),
+    }
 
     def __call__(self) -> None:
         url = settings.DATABASE_URL
@@ -22,17 +49,23 @@ class DbConfigCommand(ManagementCommand):
             raise RuntimeError("database is not configured")
 
         comps = settings.db_components_from_database_url()
+        values: Dict[str, Any] = {
+            key: getattr(comps, key) for key in FIELDS.values()
+        }
+
+        output_format = self.option_value("--format")
 
-        if self.option_is_active("--db-name"):
-            print(comps.DB_NAME)  # noqa: T001
-        elif self.option_is_active("--host"):
-            print(comps.DB_HOST)  # noqa: T001
-        elif self.option_is_active("--password"):
-            print(comps.DB_PASSWORD)  # noqa: T001
-        elif self.option_is_active("--port"):
-            print(comps.DB_PORT)  # noqa: T001
-        elif self.option_is_active("--username"):
-            print(comps.DB_USER)  # noqa: T001
+        requested = [
+            key
+            for argument, key in FIELDS.items()
+            if self.option_is_active(argument)
+        ]
+
+        if len(requested) == 1 and not output_format:
+            print(values[requested[0]])  # noqa: T001
+        elif requested or output_format:
+            fields = {key: values[key] for key in requested or sorted(values)}
+            print(format_fields(fields, output_format or "env"))  # noqa: T001
         else:
             full_config = f"""
                 URL:     \t{settings.DATABASE_URL}
@@ -45,3 +78,15 @@ class DbConfigCommand(ManagementCommand):
                 DATABASE:\t{comps.DB_NAME}
             """
             print(full_config)  # noqa: T001
+
+
+def format_fields(fields: Dict[str, Any], output_format: str) -> str:
+    if output_format == "json":
+        return json.dumps(fields, sort_keys=True)
+
+    lines = [
+        f"{key}={shlex.quote('' if value is None else str(value))}"
+        for key, value in fields.items()
+    ]
+
+    return "\n".join(lines)
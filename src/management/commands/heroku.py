@@ -1,6 +1,11 @@
+import asyncio
 import json
+from contextlib import asynccontextmanager
+from importlib.util import find_spec
 from typing import Any
+from typing import AsyncIterator
 from typing import Dict
+from typing import List
 from typing import Optional
 
 import httpx
@@ -10,6 +15,13 @@ from management.commands.abstract import ManagementCommand
 
 HEROKU_API_URL = "https://api.heroku.com/apps"
 
+# HTTP/2 needs the optional h2 package
+HTTP2 = find_spec("h2") is not None
+
+RETRY_ATTEMPTS = 4
+RETRY_BACKOFF = 0.5
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
 
 class HerokuCommand(ManagementCommand):
     name = "heroku"
@@ -24,71 +36,155 @@ class HerokuCommand(ManagementCommand):
             " Both HEROKU_APP_NAME and HEROKU_API_KEY MUST be configured."
         ),
     }
+    options = {
+        "--apps": (
+            "Comma-separated names of the apps, processed concurrently."
+            " Default: HEROKU_APP_NAME"
+        ),
+    }
 
     def __init__(self, *args: Any, **kwargs: Any):
         super().__init__(*args, **kwargs)
 
-        assert settings.HEROKU_APP_NAME, "Heroku app name is not configured"
+        apps = self.option_value("--apps") or settings.HEROKU_APP_NAME
+        self.apps = [app for app in (apps or "").split(",") if app]
+
+        assert self.apps, "Heroku app name is not configured"
         assert (
             settings.HEROKU_API_TOKEN
         ), "Heroku API token is not set: see https://help.heroku.com/PBGP6IDE/"
 
     def __call__(self) -> None:
         if self.option_is_active("--configure"):
-            self._configure()
+            results = asyncio.run(configure_apps(self.apps))
         else:
-            self._get_config()
+            results = asyncio.run(get_configs(self.apps))
 
-    @classmethod
-    def _get_config(cls) -> None:
-        response = cls._api_call()
-        payload = response.json()
+        payload = results[self.apps[0]] if len(self.apps) == 1 else results
         print(json.dumps(payload, sort_keys=True, indent=4))  # noqa: T001
 
-    @classmethod
-    def _configure(cls) -> None:
-        payload = {
-            name: value
-            for name, value in {
-                "PYTHONPATH": "src",
-                "SENTRY_DSN": settings.SENTRY_DSN,
-            }.items()
-            if value is not None
-        }
-
-        response = cls._api_call(
-            method="patch", path="config-vars", payload=payload
+
+def get_config_vars() -> Dict[str, str]:
+    config_vars = {
+        name: value
+        for name, value in {
+            "PYTHONPATH": "src",
+            "SENTRY_DSN": settings.SENTRY_DSN,
+        }.items()
+        if value is not None
+    }
+
+    return config_vars
+
+
+async def get_configs(
+    apps: List[str],
+    *,
+    transport: Optional[httpx.AsyncBaseTransport] = None,
+) -> Dict[str, Any]:
+    async with open_client(transport=transport) as client:
+        responses = await asyncio.gather(
+            *(api_call(client, app) for app in apps)
         )
-        payload = response.json()
-        print(json.dumps(payload, sort_keys=True, indent=4))  # noqa: T001
 
-    @staticmethod
-    def _api_call(
-        *,
-        method: str = "get",
-        path: str = "",
-        payload: Optional[Dict] = None,
-    ) -> httpx.Response:
-        headers = {
-            "Accept": "application/vnd.heroku+json; version=3",
-            "Authorization": f"Bearer {settings.HEROKU_API_TOKEN}",
-            "Content-Type": "application/json",
-        }
-
-        url = f"{HEROKU_API_URL}/{settings.HEROKU_APP_NAME}/{path}"
-
-        meth = getattr(httpx, method.lower())
-
-        meth_kwargs = {
-            "headers": headers,
-        }
-        if payload:
-            meth_kwargs["json"] = payload
-
-        response: httpx.Response = meth(url, **meth_kwargs)
-        assert response.status_code == 200, (
-            f"unable to get app info: {response.status_code}\n"
-            f"{response.content!r}"
+    return {app: resp.json() for app, resp in zip(apps, responses)}
+
+
+async def configure_apps(
+    apps: List[str],
+    *,
+    transport: Optional[httpx.AsyncBaseTransport] = None,
+) -> Dict[str, Any]:
+    config_vars = get_config_vars()
+
+    async with open_client(transport=transport) as client:
+        responses = await asyncio.gather(
+            *(
+                api_call(
+                    client,
+                    app,
+                    method="patch",
+                    path="config-vars",
+                    payload=config_vars,
+                )
+                for app in apps
+            )
         )
 
-        return response
+    return {app: resp.json() for app, resp in zip(apps, responses)}
+
+
+@asynccontextmanager
+async def open_client(
+    *,
+    transport: Optional[httpx.AsyncBaseTransport] = None,
+) -> AsyncIterator[httpx.AsyncClient]:
+    """
+    One client per command run: all API calls share its keep-alive
+    connections (and the TLS handshake), over HTTP/2 when h2 is installed.
+    """
+
+    headers = {
+        "Accept": "application/vnd.heroku+json; version=3",
+        "Authorization": f"Bearer {settings.HEROKU_API_TOKEN}",
+        "Content-Type": "application/json",
+    }
+
+    client_kwargs: Dict[str, Any] = {
+        "base_url": HEROKU_API_URL,
+        "headers": headers,
+        "http2": HTTP2,
+        "timeout": httpx.Timeout(settings.REQUEST_TIMEOUT),
+    }
+    if transport is not None:
+        client_kwargs["transport"] = transport
+
+    async with httpx.AsyncClient(**client_kwargs) as client:
+        yield client
+
+
+async def api_call(
+    client: httpx.AsyncClient,
+    app: str,
+    *,
+    method: str = "get",
+    path: str = "",
+    payload: Optional[Dict] = None,
+) -> httpx.Response:
+    """
+    Retries on 429, 5xx and transport errors with exponential backoff,
+    honouring Retry-After. The calls are idempotent, PATCH included.
+    """
+
+    url = f"/{app}/{path}"
+
+    for attempt in range(RETRY_ATTEMPTS):
+        last_attempt = attempt == RETRY_ATTEMPTS - 1
+
+        try:
+            response = await client.request(method.upper(), url, json=payload)
+        except httpx.TransportError:
+            if last_attempt:
+                raise
+            await asyncio.sleep(RETRY_BACKOFF * (1 << attempt))
+            continue
+
+        if response.status_code not in RETRY_STATUSES or last_attempt:
+            break
+
+        await asyncio.sleep(get_retry_delay(response, attempt))
+
+    assert response.status_code == 200, (
+        f"unable to call {method.upper()} {url}: {response.status_code}\n"
+        f"{response.content!r}"
+    )
+
+    return response
+
+
+def get_retry_delay(response: httpx.Response, attempt: int) -> float:
+    retry_after = response.headers.get("retry-after", "")
+    if retry_after.isdigit():
+        return float(retry_after)
+
+    return RETRY_BACKOFF * (1 << attempt)
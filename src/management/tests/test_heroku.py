@@ -0,0 +1,66 @@
+from typing import List
+from unittest import mock
+
+import httpx
+import pytest
+
+from management.commands.heroku import configure_apps
+from management.commands.heroku import get_configs
+
+pytestmark = [
+    pytest.mark.asyncio,
+    pytest.mark.unit,
+]
+
+
+@mock.patch("management.commands.heroku.RETRY_BACKOFF", 0)
+async def test_retries_and_keeps_one_client() -> None:
+    requests: List[httpx.Request] = []
+    statuses = iter([429, 503, 200])
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(next(statuses), json={"name": "app"})
+
+    configs = await get_configs(
+        ["app"],
+        transport=httpx.MockTransport(handler),
+    )
+
+    assert configs == {"app": {"name": "app"}}
+    assert [str(request.url) for request in requests] == [
+        "https://api.heroku.com/apps/app/"
+    ] * 3
+
+
+@mock.patch("management.commands.heroku.RETRY_ATTEMPTS", 2)
+@mock.patch("management.commands.heroku.RETRY_BACKOFF", 0)
+async def test_gives_up() -> None:
+    transport = httpx.MockTransport(lambda _request: httpx.Response(500))
+
+    with pytest.raises(AssertionError):
+        await get_configs(["app"], transport=transport)
+
+
+async def test_configure_apps_concurrently() -> None:
+    requests: List[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, json={"PYTHONPATH": "src"})
+
+    with mock.patch("framework.config.settings.SENTRY_DSN", None):
+        configs = await configure_apps(
+            ["a", "b"],
+            transport=httpx.MockTransport(handler),
+        )
+
+    assert configs == {"a": {"PYTHONPATH": "src"}, "b": {"PYTHONPATH": "src"}}
+    assert sorted(request.url.path for request in requests) == [
+        "/apps/a/config-vars",
+        "/apps/b/config-vars",
+    ]
+    assert {request.method for request in requests} == {"PATCH"}
+    assert {request.content for request in requests} == {
+        b'{"PYTHONPATH": "src"}'
+    }
@@ -53,7 +53,6 @@ async def test_asgi_app(asgi_client: httpx.AsyncClient) -> None:
 
     validate_payload(
         payload,
-        request__more_body=True,
         scope__client__port_range=range(123, 124),
     )
 